@@ -0,0 +1,167 @@
+from glob import glob
+import hashlib
+import json
+import os
+
+from PIL import Image
+
+from output import dump_json, write_if_changed
+
+
+def pack_rectangles(
+    sizes: list[tuple[int, int]],
+    sheet_size: int,
+    padding: int = 0,
+) -> list[tuple[int, int, int]]:
+    """
+    Pack rectangles into as few square sheets as possible, using shelves
+    (first fit, tallest first). Every rectangle has to fit in a sheet.
+
+    Returns:
+        list[tuple[int, int, int]]: The `(sheet, x, y)` of each rectangle, in
+        the same order as `sizes`.
+    """
+    # sheet: [[y, height, next x], ...]
+    sheets: list[list[list[int]]] = []
+    # sheet: y of the next shelf
+    sheet_heights: list[int] = []
+    result: list[tuple[int, int, int] | None] = [None] * len(sizes)
+
+    order = sorted(range(len(sizes)), key = lambda index: (-sizes[index][1], -sizes[index][0]))
+    for index in order:
+        width, height = sizes[index]
+        width += padding
+        height += padding
+        if width > sheet_size or height > sheet_size:
+            raise ValueError(f'{sizes[index]} does not fit in a {sheet_size} sheet')
+
+        for sheet, shelves in enumerate(sheets):
+            shelf = next((
+                shelf for shelf in shelves
+                if shelf[1] >= height and shelf[2] + width <= sheet_size
+            ), None)
+            if shelf is None and sheet_heights[sheet] + height <= sheet_size:
+                shelf = [sheet_heights[sheet], height, 0]
+                shelves.append(shelf)
+                sheet_heights[sheet] += height
+            if shelf is not None:
+                break
+        else:
+            sheet = len(sheets)
+            shelf = [0, height, 0]
+            sheets.append([shelf])
+            sheet_heights.append(height)
+
+        result[index] = (sheet, shelf[2], shelf[0])
+        shelf[2] += width
+
+    return result
+
+def get_atlas_key(images: dict[str, str], settings: dict) -> str:
+    """
+    Get a key that changes whenever any of the images (by size and mtime) or
+    the settings change.
+    """
+    files = []
+    for id, path in images.items():
+        stat = os.stat(path)
+        files.append([id, path, stat.st_size, stat.st_mtime])
+
+    return hashlib.sha256(json.dumps([files, settings]).encode('utf-8')).hexdigest()
+
+def build_atlas(
+    images: dict[str, str],
+    folder: str,
+    name: str,
+    url: str,
+    thumbnail_size: int = 64,
+    sheet_size: int = 2048,
+    padding: int = 1,
+) -> dict:
+    """
+    Pack thumbnails of images into atlas sheets, saved in `folder` as
+    `{name}-{sheet}.png`, with `{name}.json` mapping each id to its
+    `[sheet, x, y, width, height]` and `{name}.css` with a class for each
+    id (`.{name}-{id}`). `url` is the url of `folder` on the site.
+
+    If nothing changed since the last time, the atlas isn't built again.
+
+    Returns:
+        dict: The map.
+    """
+    map_path = os.path.join(folder, f'{name}.json')
+    settings = {
+        'thumbnail_size': thumbnail_size,
+        'sheet_size': sheet_size,
+        'padding': padding,
+        'url': url,
+    }
+    key = get_atlas_key(images, settings)
+
+    if os.path.exists(map_path):
+        with open(map_path, 'r', encoding = 'utf-8') as file:
+            atlas = json.load(file)
+        if atlas.get('key') == key:
+            return atlas
+
+    thumbnails = {}
+    for id, path in images.items():
+        with Image.open(path) as image:
+            thumbnail = image.convert('RGBA')
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
+        thumbnails[id] = thumbnail
+
+    ids = list(thumbnails)
+    positions = pack_rectangles(
+        [thumbnails[id].size for id in ids],
+        sheet_size,
+        padding,
+    )
+
+    sheet_count = max((sheet for sheet, x, y in positions), default = -1) + 1
+    sheets = [Image.new('RGBA', (sheet_size, sheet_size), (0, 0, 0, 0)) for _ in range(sheet_count)]
+    items = {}
+    for id, (sheet, x, y) in zip(ids, positions):
+        sheets[sheet].paste(thumbnails[id], (x, y))
+        items[id] = [sheet, x, y, thumbnails[id].width, thumbnails[id].height]
+
+    os.makedirs(folder, exist_ok = True)
+
+    sheet_urls = []
+    for index, sheet in enumerate(sheets):
+        # the bottom of the last sheet is usually empty
+        bbox = sheet.getbbox()
+        if bbox is not None:
+            sheet = sheet.crop((0, 0, sheet_size, bbox[3]))
+
+        sheet_path = os.path.join(folder, f'{name}-{index}.png')
+        sheet.save(sheet_path, optimize = True)
+        sheet_urls.append(f'{url}/{name}-{index}.png')
+
+    # sheets left over from when there were more
+    for old_path in glob(os.path.join(folder, f'{name}-*.png')):
+        sheet = os.path.splitext(os.path.basename(old_path))[0][len(name) + 1:]
+        if sheet.isdigit() and int(sheet) >= sheet_count:
+            os.remove(old_path)
+
+    atlas = {
+        'key': key,
+        **settings,
+        'sheets': sheet_urls,
+        # id: [sheet, x, y, width, height]
+        'items': items,
+    }
+
+    css = [
+        f'.{name} {{ display: inline-block; background-repeat: no-repeat; }}',
+    ]
+    for id, (sheet, x, y, width, height) in items.items():
+        css.append(
+            f'.{name}-{id} {{ background-image: url("{sheet_urls[sheet]}"); '
+            f'background-position: {-x}px {-y}px; width: {width}px; height: {height}px; }}'
+        )
+
+    write_if_changed(os.path.join(folder, f'{name}.css'), ('\n'.join(css) + '\n').encode('utf-8'))
+    write_if_changed(map_path, dump_json(atlas, compact = False))
+
+    return atlas
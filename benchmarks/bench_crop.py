@@ -0,0 +1,122 @@
+"""
+Compare `crop.crop_image` against the old numpy version on large textures.
+
+Run from the repo root:
+
+    python benchmarks/bench_crop.py
+    python benchmarks/bench_crop.py --sizes 2048 4096 --repeat 10
+
+Peak memory is measured in a fresh process for each run, using the max RSS
+from `resource`, so it isn't available on Windows.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import timeit
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crop import crop_image
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def legacy_crop_image(pil_image: Image.Image):
+    # crop_image before it was reimplemented
+    pil_image = pil_image.convert('RGBA')
+    np_array = np.array(pil_image)
+    blank_px = pil_image.getpixel((0,0))
+    mask = np_array != blank_px
+    mask = np.take(mask,axis=2,indices=3)
+    coords = np.argwhere(mask)
+    x0, y0 = coords.min(axis=0)
+    x1, y1 = coords.max(axis=0) + 1
+    cropped_box = np_array[x0:x1, y0:y1]
+    pil_image = Image.fromarray(cropped_box, 'RGBA')
+    return pil_image
+
+IMPLEMENTATIONS = {
+    'legacy': legacy_crop_image,
+    'current': crop_image,
+}
+
+
+def make_texture(size: int) -> Image.Image:
+    # mostly opaque pony shaped blob with a transparent border, like the game textures
+    image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    margin = size // 8
+    draw.ellipse((margin, margin, size - margin, size - margin // 2), fill = (200, 120, 220, 255))
+    draw.rectangle((size // 3, size // 4, size // 2, size // 2), fill = (255, 255, 255, 128))
+    return image
+
+def get_max_rss() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports KiB, macOS reports bytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+def measure_memory(implementation: str, size: int, queue: multiprocessing.Queue):
+    image = make_texture(size)
+    image.load()
+    before = get_max_rss()
+    IMPLEMENTATIONS[implementation](image)
+    queue.put(get_max_rss() - before)
+
+def peak_memory(implementation: str, size: int) -> int | None:
+    if resource is None:
+        return None
+    
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target = measure_memory, args = (implementation, size, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description = 'Benchmark crop_image',
+    )
+
+    argparser.add_argument(
+        '-s', '--sizes',
+        nargs = '+',
+        type = int,
+        default = [1024, 2048, 4096],
+        help = 'Texture sizes to test',
+    )
+
+    argparser.add_argument(
+        '-r', '--repeat',
+        type = int,
+        default = 5,
+        help = 'Number of times to time each implementation',
+    )
+
+    args = argparser.parse_args()
+
+    print(f'{"size":>6} {"implementation":<15} {"best (ms)":>10} {"peak extra (MiB)":>17}')
+    for size in args.sizes:
+        image = make_texture(size)
+        assert legacy_crop_image(image).tobytes() == crop_image(image).tobytes()
+
+        for name, implementation in IMPLEMENTATIONS.items():
+            best = min(timeit.repeat(
+                lambda: implementation(image),
+                number = 1,
+                repeat = args.repeat,
+            ))
+            memory = peak_memory(name, size)
+            memory = 'n/a' if memory is None else f'{memory / 1024 / 1024:.1f}'
+            print(f'{size:>6} {name:<15} {best * 1000:>10.1f} {memory:>17}')
+
+if __name__ == '__main__':
+    main()
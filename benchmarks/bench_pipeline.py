@@ -0,0 +1,330 @@
+"""
+Benchmark `update_ponies.py` on synthetic game folders (see
+synthetic_game.py) at different scales.
+
+Run from the repo root:
+
+    python benchmarks/bench_pipeline.py run
+    python benchmarks/bench_pipeline.py run --scales small medium --save-baseline main
+    python benchmarks/bench_pipeline.py compare --baseline main --threshold 10
+
+`run` times `crop_image`, `translate`, `get_game_file`, and a cold and warm
+end-to-end run of `GetGameData` with every one of its stages (`ponies` is
+`get_ponies()`). Each benchmark is run `--repeat` times and the best time is
+kept. Results go to `.cache/benchmarks/latest.json`, and `--save-baseline`
+also saves them in `benchmarks/baselines`.
+
+`compare` checks results against a baseline, and exits with 1 if anything
+got slower by more than `--threshold` percent. Baselines are only useful on
+the machine they were made on, so none are committed. Make one with
+`run --save-baseline main` first, otherwise `compare` exits with 2.
+
+Every synthetic game is read back with luna_kit when it's generated, so a
+run fails instead of timing files the pipeline can't load (see
+synthetic_game.py).
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import update_ponies
+from crop import crop_image
+from game_files import open_game_files
+from luna_kit.loc import LOC
+from synthetic_game import SCALES, generate_game
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+BASELINES_FOLDER = os.path.join(BENCHMARKS_FOLDER, 'baselines')
+DEFAULT_RESULTS = os.path.join('.cache', 'benchmarks', 'latest.json')
+
+# anything faster than this is too noisy to compare
+MIN_SECONDS = 0.01
+
+
+def best_of(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+@contextmanager
+def quiet():
+    update_ponies.console.quiet = True
+    try:
+        yield
+    finally:
+        update_ponies.console.quiet = False
+
+
+def bench_crop(game_folder: str, repeat: int) -> float:
+    images = []
+    for path in sorted(glob.glob(os.path.join(game_folder, 'ponies', '*_full.png'))):
+        image = Image.open(path)
+        image.load()
+        images.append(image)
+
+    return best_of(lambda: [crop_image(image) for image in images], repeat)
+
+def bench_translate(game_folder: str, repeat: int) -> dict[str, float]:
+    loc_files = [LOC(path) for path in sorted(glob.glob(os.path.join(game_folder, '*.loc')))]
+    keys = [
+        key
+        for index in range(len(glob.glob(os.path.join(game_folder, 'ponies', '*_full.png'))))
+        for key in (f'STR_PONY_{index}', f'STR_PONY_DESC_{index}')
+    ]
+
+    def translation_index():
+        translations = update_ponies.TranslationIndex(loc_files, keys)
+        for key in keys:
+            translations.translate(key, {})
+
+    return {
+        'translate': best_of(lambda: [update_ponies.translate(key, loc_files) for key in keys], repeat),
+        'translation index': best_of(translation_index, repeat),
+    }
+
+def bench_get_game_file(game_folder: str, repeat: int) -> dict[str, float]:
+    # only what get_game_file() needs, without running the whole pipeline
+    game_data = update_ponies.GetGameData.__new__(update_ponies.GetGameData)
+    game_data.game_files = open_game_files(game_folder)
+    game_data.encodings = {}
+    game_data.encoding_cache = {}
+
+    def read(mode: str):
+        with game_data.get_game_file('gameobjectdata.xml', mode) as file:
+            while file.read(1024 * 1024):
+                pass
+
+    return {
+        'get_game_file text': best_of(lambda: read('r'), repeat),
+        'get_game_file binary': best_of(lambda: read('rb'), repeat),
+    }
+
+def run_pipeline(game_folder: str, output_folder: str, cache_folder: str, jobs: int | None) -> dict[str, float]:
+    os.makedirs(os.path.join(output_folder, 'json'), exist_ok = True)
+    game_data_path = os.path.join(output_folder, 'json', 'game-data.json')
+    if not os.path.exists(game_data_path):
+        with open(game_data_path, 'w', encoding = 'utf-8') as file:
+            file.write('{}')
+
+    start = time.perf_counter()
+    with quiet():
+        game_data = update_ponies.GetGameData(
+            'benchmark',
+            game_folder,
+            output_folder,
+            jobs = jobs,
+            cache_folder = cache_folder,
+        )
+    results = {'total': time.perf_counter() - start}
+    for stage, timing in game_data.timings.items():
+        results[stage] = timing['wall']
+
+    return results
+
+def bench_pipeline(game_folder: str, repeat: int, jobs: int | None) -> dict[str, float]:
+    results = {}
+
+    def add(prefix: str, times: dict[str, float]):
+        for name, seconds in times.items():
+            name = f'{prefix} {name}'
+            results[name] = min(results.get(name, seconds), seconds)
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as folder:
+            output_folder = os.path.join(folder, 'output')
+            cache_folder = os.path.join(folder, 'cache')
+            # the cold run fills the caches the warm one uses
+            add('cold', run_pipeline(game_folder, output_folder, cache_folder, jobs))
+            add('warm', run_pipeline(game_folder, output_folder, cache_folder, jobs))
+
+    return results
+
+
+def run(args):
+    results = {
+        'created': datetime.now().isoformat(timespec = 'seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'jobs': args.jobs,
+        'repeat': args.repeat,
+        'scales': {},
+    }
+
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as game_folder:
+            print(f'generating {scale} game')
+            settings = generate_game(game_folder, pvr_ratio = args.pvr_ratio, **SCALES[scale])
+
+            print(f'benchmarking {scale}')
+            scale_results = {
+                'crop_image': bench_crop(game_folder, args.repeat),
+                **bench_translate(game_folder, args.repeat),
+                **bench_get_game_file(game_folder, args.repeat),
+                **bench_pipeline(game_folder, args.repeat, args.jobs),
+            }
+
+        results['scales'][scale] = {
+            'settings': settings,
+            'results': scale_results,
+        }
+        for name, seconds in scale_results.items():
+            print(f'  {name:<40} {seconds * 1000:>10.1f} ms')
+
+    paths = [args.output]
+    if args.save_baseline:
+        paths.append(os.path.join(BASELINES_FOLDER, f'{args.save_baseline}.json'))
+    for path in paths:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, 'w', encoding = 'utf-8') as file:
+            json.dump(results, file, indent = 2)
+        print(f'saved {path}')
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """
+    Get every benchmark that's in both results, with how much slower it got
+    (as a percentage) and whether that's a regression.
+    """
+    comparisons = []
+    for scale, scale_results in current['scales'].items():
+        baseline_results = baseline['scales'].get(scale, {}).get('results', {})
+        for name, seconds in scale_results['results'].items():
+            if name not in baseline_results:
+                continue
+
+            baseline_seconds = baseline_results[name]
+            change = (seconds - baseline_seconds) / baseline_seconds * 100 if baseline_seconds > 0 else 0.0
+            comparisons.append({
+                'scale': scale,
+                'name': name,
+                'baseline': baseline_seconds,
+                'current': seconds,
+                'change': change,
+                'regression': change > threshold and max(seconds, baseline_seconds) >= MIN_SECONDS,
+            })
+
+    return comparisons
+
+def compare(args):
+    baseline_path = args.baseline
+    if not os.path.exists(baseline_path):
+        baseline_path = os.path.join(BASELINES_FOLDER, f'{args.baseline}.json')
+
+    if not os.path.exists(baseline_path):
+        name = os.path.splitext(os.path.basename(args.baseline))[0]
+        print(f'no baseline at {baseline_path}, make one with: python benchmarks/bench_pipeline.py run --save-baseline {name}')
+        sys.exit(2)
+    if not os.path.exists(args.results):
+        print(f'no results at {args.results}, make them with: python benchmarks/bench_pipeline.py run')
+        sys.exit(2)
+
+    with open(baseline_path, 'r', encoding = 'utf-8') as file:
+        baseline = json.load(file)
+    with open(args.results, 'r', encoding = 'utf-8') as file:
+        current = json.load(file)
+
+    comparisons = compare_results(baseline, current, args.threshold)
+
+    print(f'{"scale":<8} {"benchmark":<40} {"baseline (ms)":>14} {"current (ms)":>14} {"change":>8}')
+    for comparison in comparisons:
+        print(
+            f'{comparison["scale"]:<8} {comparison["name"]:<40} '
+            f'{comparison["baseline"] * 1000:>14.1f} {comparison["current"] * 1000:>14.1f} '
+            f'{comparison["change"]:>+7.1f}%'
+            + (' SLOWER' if comparison['regression'] else '')
+        )
+
+    regressions = [comparison for comparison in comparisons if comparison['regression']]
+    if regressions:
+        print(f'{len(regressions)} benchmarks are more than {args.threshold}% slower than {baseline_path}')
+        sys.exit(1)
+
+    print(f'nothing is more than {args.threshold}% slower than {baseline_path}')
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description = 'Benchmark update_ponies.py on synthetic game folders',
+    )
+    subparsers = argparser.add_subparsers(dest = 'command', required = True)
+
+    run_parser = subparsers.add_parser('run', help = 'Run the benchmarks')
+    run_parser.add_argument(
+        '-s', '--scales',
+        nargs = '+',
+        choices = list(SCALES),
+        default = ['small', 'medium'],
+        help = 'Game sizes to benchmark',
+    )
+    run_parser.add_argument(
+        '-r', '--repeat',
+        type = int,
+        default = 3,
+        help = 'Number of times to run each benchmark',
+    )
+    run_parser.add_argument(
+        '-j', '--jobs',
+        type = int,
+        default = None,
+        help = 'Processes for the pipeline to use (defaults to all cores)',
+    )
+    run_parser.add_argument(
+        '-p', '--pvr-ratio',
+        type = float,
+        default = 0.5,
+        help = 'Share of portraits saved as PVR instead of PNG',
+    )
+    run_parser.add_argument(
+        '-o', '--output',
+        default = DEFAULT_RESULTS,
+        help = 'Where to save the results',
+    )
+    run_parser.add_argument(
+        '-b', '--save-baseline',
+        metavar = 'NAME',
+        help = 'Also save the results as a baseline',
+    )
+
+    compare_parser = subparsers.add_parser('compare', help = 'Compare results to a baseline')
+    compare_parser.add_argument(
+        'results',
+        nargs = '?',
+        default = DEFAULT_RESULTS,
+        help = 'Results to check',
+    )
+    compare_parser.add_argument(
+        '-b', '--baseline',
+        default = 'main',
+        help = 'Baseline name (in benchmarks/baselines) or path',
+    )
+    compare_parser.add_argument(
+        '-t', '--threshold',
+        type = float,
+        default = 10,
+        help = 'How many percent slower counts as a regression',
+    )
+
+    args = argparser.parse_args()
+
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""
+Generate a fake game folder for benchmarking `update_ponies.py`, with as
+many ponies, languages and filler objects as needed.
+
+    python benchmarks/synthetic_game.py game-folder --scale medium
+    python benchmarks/synthetic_game.py game-folder --ponies 5000 --languages 3
+
+The folder has everything `GetGameData` reads: gameobjectdata.xml (with
+HiddenPony and filler categories), shopdata.xml, gameobjectcategorydata.xml,
+a .loc file per language, PNG and PVR textures, data_ver.xml and
+defaultGameCampaign.json. The same arguments always generate the same files.
+
+The .loc and PVR files are written by hand (`write_loc()` and
+`write_pvr()`), so every generated game is read back with luna_kit's `LOC`
+and `PVR`, the same way the pipeline reads them. If those don't give back
+what was written, `generate_game()` raises `FixtureError` instead of leaving
+a game the pipeline can't load (and benchmarks that mean nothing).
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import xml.etree.ElementTree as ET
+
+from luna_kit.loc import LOC
+from luna_kit.pvr import PVR
+from PIL import Image, ImageDraw
+
+SCALES = {
+    'small': {
+        'ponies': 100,
+        'languages': 2,
+        'texture_size': 128,
+        'filler_objects': 1000,
+    },
+    'medium': {
+        'ponies': 500,
+        'languages': 5,
+        'texture_size': 256,
+        'filler_objects': 10000,
+    },
+    'large': {
+        'ponies': 2000,
+        'languages': 10,
+        'texture_size': 512,
+        'filler_objects': 50000,
+    },
+}
+
+LANGUAGES = [
+    'english',
+    'french',
+    'german',
+    'italian',
+    'spanish',
+    'brazilian',
+    'russian',
+    'japanese',
+    'chinese',
+    'korean',
+]
+
+FILLER_CATEGORIES = [
+    'Decore',
+    'House',
+    'Path',
+    'Tree',
+]
+
+WORDS = [
+    'apple', 'star', 'moon', 'sun', 'cloud', 'berry', 'spark', 'glow',
+    'dash', 'mist', 'bloom', 'frost', 'honey', 'pearl', 'thunder', 'whisper',
+]
+
+
+class FixtureError(Exception):
+    pass
+
+
+def write_xml(path: str, root: ET.Element):
+    ET.ElementTree(root).write(path, encoding = 'utf-8', xml_declaration = True)
+
+def write_loc(path: str, strings: dict[str, str]):
+    """
+    Write a .loc file: the number of strings, then each key and value as a
+    length prefixed utf-8 string (all little endian uint32).
+    """
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<I', len(strings)))
+        for key, value in strings.items():
+            for string in (key, value):
+                data = string.encode('utf-8')
+                file.write(struct.pack('<I', len(data)))
+                file.write(data)
+
+def write_pvr(path: str, image: Image.Image):
+    """
+    Write an uncompressed RGBA8888 PVR v3 texture.
+    """
+    image = image.convert('RGBA')
+    header = struct.pack(
+        '<II4s4sIIIIIIII',
+        0x03525650, # version
+        0, # flags
+        b'rgba', # channel order
+        bytes([8, 8, 8, 8]), # bits per channel
+        0, # colour space (linear)
+        0, # channel type (unsigned byte normalised)
+        image.height,
+        image.width,
+        1, # depth
+        1, # surfaces
+        1, # faces
+        1, # mipmaps
+    )
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.write(struct.pack('<I', 0)) # metadata size
+        file.write(image.tobytes())
+
+def check_loc(path: str, strings: dict[str, str]):
+    """
+    Make sure luna_kit reads a generated .loc file back the way it was
+    written.
+    """
+    try:
+        loc = LOC(path)
+        mismatched = [key for key, value in strings.items() if loc.translate(key) != value]
+        dev_id = loc['DEV_ID']
+    except Exception as e:
+        raise FixtureError(f"luna_kit can't read the generated {os.path.basename(path)}: {type(e).__name__}: {e}") from e
+    
+    if mismatched or dev_id != strings['DEV_ID']:
+        raise FixtureError(f'luna_kit reads the generated {os.path.basename(path)} differently, write_loc() needs fixing (first wrong key: {(mismatched or ["DEV_ID"])[0]})')
+
+def check_pvr(path: str, image: Image.Image):
+    """
+    Make sure luna_kit decodes a generated PVR texture to the image it was
+    made from.
+    """
+    try:
+        decoded = PVR(path, external_alpha = True).image.convert('RGBA')
+    except Exception as e:
+        raise FixtureError(f"luna_kit can't read the generated {os.path.basename(path)}: {type(e).__name__}: {e}") from e
+    
+    if decoded.size != image.size or decoded.tobytes() != image.convert('RGBA').tobytes():
+        raise FixtureError(f'luna_kit decodes the generated {os.path.basename(path)} differently, write_pvr() needs fixing')
+
+def make_texture(size: int, rng: random.Random) -> Image.Image:
+    # a blob with a transparent border, so there's something to crop
+    image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    left, top = rng.randint(0, size // 4), rng.randint(0, size // 4)
+    right, bottom = size - rng.randint(1, size // 4), size - rng.randint(1, size // 4)
+    color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255), 255)
+    draw.ellipse((left, top, right, bottom), fill = color)
+    draw.rectangle((size // 3, size // 3, size // 2, size // 2), fill = (255, 255, 255, 128))
+    return image
+
+def make_name(rng: random.Random, words: int = 2) -> str:
+    return ' '.join(rng.choice(WORDS).capitalize() for _ in range(words))
+
+
+def generate_game(
+    folder: str,
+    ponies: int = 100,
+    languages: int = 2,
+    texture_size: int = 128,
+    filler_objects: int = 1000,
+    pvr_ratio: float = 0.5,
+    content_version: str = '1.0.0',
+    seed: int = 0,
+) -> dict:
+    """
+    Generate a game folder. One .loc file and one PVR texture get read back
+    with luna_kit to check them, see `FixtureError`.
+
+    Returns:
+        dict: The settings it was generated with.
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(folder, 'ponies'), exist_ok = True)
+
+    pony_ids = [f'Pony_Synthetic_{index:05}' for index in range(ponies)]
+    languages = LANGUAGES[:languages]
+
+    # gameobjectdata.xml
+
+    root = ET.Element('GameObjects')
+    for category_index, category_id in enumerate(FILLER_CATEGORIES):
+        category = ET.SubElement(root, 'Category', ID = category_id)
+        for index in range(category_index, filler_objects, len(FILLER_CATEGORIES)):
+            game_object = ET.SubElement(category, 'GameObject', ID = f'{category_id}_{index:06}')
+            ET.SubElement(game_object, 'Name', Unlocal = f'STR_{category_id.upper()}_{index}')
+            ET.SubElement(game_object, 'Shop', Icon = f'shop/{category_id}_{index}.png', Cost = str(rng.randint(1, 5000)))
+            ET.SubElement(game_object, 'House', HomeMapZone = str(rng.randint(0, 6)))
+
+    category = ET.SubElement(root, 'Category', ID = 'Pony')
+    for index, pony_id in enumerate(pony_ids):
+        game_object = ET.SubElement(category, 'GameObject', ID = pony_id)
+        ET.SubElement(game_object, 'Name', Unlocal = f'STR_PONY_{index}')
+        ET.SubElement(game_object, 'Description', Unlocal = f'STR_PONY_DESC_{index}')
+        ET.SubElement(game_object, 'Icon', Url = f'ponies/{pony_id}_icon')
+        ET.SubElement(game_object, 'Shop', Icon = f'ponies/{pony_id}_full.png')
+        ET.SubElement(game_object, 'House', HomeMapZone = str(rng.randint(0, 6)), Type = f'House_{index % 50}')
+        ET.SubElement(game_object, 'AI', Max_Level = str(rng.randint(0, 1)))
+        ET.SubElement(game_object, 'OnArrive', EarnXP = str(rng.randint(0, 10000)))
+        ET.SubElement(
+            game_object,
+            'Minigames',
+            CanPlayMineCart = str(rng.randint(0, 1)),
+            TimeBetweenPlayActions = str(rng.randint(0, 86400)),
+            PlayActionSkipAgainCost = str(rng.randint(0, 20)),
+            EXP_Rank = str(rng.randint(0, 5)),
+        )
+
+    category = ET.SubElement(root, 'Category', ID = 'HiddenPony')
+    for index, pony_id in enumerate(pony_ids[::50]):
+        game_object = ET.SubElement(category, 'GameObject', ID = f'Hidden_{index}')
+        ET.SubElement(game_object, 'Parent', PonyName = pony_id)
+
+    write_xml(os.path.join(folder, 'gameobjectdata.xml'), root)
+
+    # shopdata.xml
+
+    root = ET.Element('ShopData')
+    category = ET.SubElement(root, 'Category', ID = 'Pony')
+    for pony_id in pony_ids:
+        ET.SubElement(
+            category,
+            'Item',
+            ID = pony_id,
+            Cost = str(rng.randint(1, 100000)),
+            CurrencyType = str(rng.randint(1, 2)),
+            UnlockValue = str(rng.randint(0, 150)),
+        )
+    write_xml(os.path.join(folder, 'shopdata.xml'), root)
+
+    write_xml(os.path.join(folder, 'gameobjectcategorydata.xml'), ET.Element('GameObjectCategories'))
+
+    # data_ver.xml and defaultGameCampaign.json
+
+    root = ET.Element('DataVersion')
+    ET.SubElement(root, 'Version', Value = content_version)
+    write_xml(os.path.join(folder, 'data_ver.xml'), root)
+
+    with open(os.path.join(folder, 'defaultGameCampaign.json'), 'w', encoding = 'utf-8') as file:
+        json.dump({
+            'mini_games': {
+                'dailygoals': {
+                    'itemshop': [
+                        {'item_id': pony_id, 'cost': rng.randint(10, 500)}
+                        for pony_id in pony_ids[::10]
+                    ],
+                },
+            },
+        }, file)
+
+    # loc files
+
+    names = [make_name(rng) for _ in pony_ids]
+    descriptions = [make_name(rng, 12) for _ in pony_ids]
+    for language in languages:
+        strings = {
+            'DEV_ID': language.upper(),
+            'STR_STORE_PONIES': f'Ponies ({language})',
+        }
+        for index in range(len(pony_ids)):
+            # most names are the same in every language, like the real game
+            name = names[index] if index % 4 else f'{names[index]} ({language})'
+            strings[f'STR_PONY_{index}'] = name + '|'
+            strings[f'STR_PONY_DESC_{index}'] = f'{descriptions[index]} ({language})'
+        for category_index, category_id in enumerate(FILLER_CATEGORIES):
+            for index in range(category_index, filler_objects, len(FILLER_CATEGORIES)):
+                strings[f'STR_{category_id.upper()}_{index}'] = make_name(rng)
+
+        write_loc(os.path.join(folder, f'{language}.loc'), strings)
+        if language == languages[0]:
+            check_loc(os.path.join(folder, f'{language}.loc'), strings)
+
+    # textures
+
+    checked_pvr = False
+    for pony_id in pony_ids:
+        icon = make_texture(texture_size // 2, rng)
+        if rng.random() < pvr_ratio:
+            write_pvr(os.path.join(folder, 'ponies', f'{pony_id}_icon.pvr'), icon)
+            if not checked_pvr:
+                check_pvr(os.path.join(folder, 'ponies', f'{pony_id}_icon.pvr'), icon)
+                checked_pvr = True
+        else:
+            icon.save(os.path.join(folder, 'ponies', f'{pony_id}_icon.png'))
+
+        make_texture(texture_size, rng).save(os.path.join(folder, 'ponies', f'{pony_id}_full.png'))
+
+    return {
+        'ponies': len(pony_ids),
+        'languages': len(languages),
+        'texture_size': texture_size,
+        'filler_objects': filler_objects,
+        'pvr_ratio': pvr_ratio,
+        'content_version': content_version,
+        'seed': seed,
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description = 'Generate a synthetic game folder',
+    )
+
+    argparser.add_argument(
+        'folder',
+        help = 'Folder to generate the game in',
+    )
+
+    argparser.add_argument(
+        '-s', '--scale',
+        choices = list(SCALES),
+        default = 'small',
+        help = 'Preset size, the other options override it',
+    )
+
+    argparser.add_argument('--ponies', type = int, help = 'Number of ponies')
+    argparser.add_argument('--languages', type = int, help = f'Number of loc files (max {len(LANGUAGES)})')
+    argparser.add_argument('--texture-size', type = int, help = 'Size of the full textures, portraits are half')
+    argparser.add_argument('--filler-objects', type = int, help = 'Number of non pony game objects')
+    argparser.add_argument(
+        '--pvr-ratio',
+        type = float,
+        default = 0.5,
+        help = 'Share of portraits saved as PVR instead of PNG',
+    )
+
+    argparser.add_argument(
+        '--seed',
+        type = int,
+        default = 0,
+        help = 'Random seed',
+    )
+
+    args = argparser.parse_args()
+
+    settings = dict(SCALES[args.scale])
+    for key in settings:
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+
+    print(generate_game(args.folder, pvr_ratio = args.pvr_ratio, seed = args.seed, **settings))
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,121 @@
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from glob import glob
+import json
+import os
+import sys
+import time
+from typing import Iterator
+
 from PIL import Image
-import numpy as np
+
+def get_crop_box(pil_image: Image.Image) -> tuple[int, int, int, int] | None:
+    """
+    Get the box of everything that has a different alpha than the top left
+    pixel. This only looks at the alpha channel and lets PIL find the box, so
+    it never has to copy the whole image into numpy.
+
+    Returns `None` if the whole image is fully transparent. An image that's
+    the same visible alpha everywhere (like a fully opaque one) has nothing
+    to crop, so that's the whole image.
+    """
+    if pil_image.mode != 'RGBA':
+        pil_image = pil_image.convert('RGBA')
+    alpha = pil_image.getchannel('A')
+    blank_alpha = alpha.getpixel((0,0))
+    if blank_alpha != 0:
+        # getbbox() finds everything that isn't 0, so map the blank alpha to 0
+        alpha = alpha.point([0 if value == blank_alpha else 255 for value in range(256)])
+    
+    crop_box = alpha.getbbox()
+    if crop_box is None and blank_alpha != 0:
+        return (0, 0, *pil_image.size)
+    
+    return crop_box
 
 def crop_image(pil_image: Image.Image):
     # pil_image = Image.open(pil_image)
-    pil_image = pil_image.convert('RGBA')
-    np_array = np.array(pil_image)
-    blank_px = pil_image.getpixel((0,0))
-    mask = np_array != blank_px
-    mask = np.take(mask,axis=2,indices=3)
-    coords = np.argwhere(mask)
-    x0, y0 = coords.min(axis=0)
-    x1, y1 = coords.max(axis=0) + 1
-    cropped_box = np_array[x0:x1, y0:y1]
-    pil_image = Image.fromarray(cropped_box, 'RGBA')
-    return pil_image
+    if pil_image.mode != 'RGBA':
+        pil_image = pil_image.convert('RGBA')
+    crop_box = get_crop_box(pil_image)
+    if crop_box is None:
+        return pil_image
+    return pil_image.crop(crop_box)
 
-if __name__ == "__main__":
-    import argparse
-    from glob import glob
+def crop_file(path: str, dry_run: bool = False) -> dict:
+    """
+    Crop an image file in place. Files that are already tight (or blank)
+    aren't rewritten. With `dry_run` this only works out the crop box.
+
+    Errors are returned in the result, so this can run in a worker pool.
+    """
+    result = {
+        'file': path,
+        'status': 'error',
+        'size': None,
+        'crop': None,
+        'bytes_before': 0,
+        'bytes_after': 0,
+        'error': None,
+    }
+    try:
+        result['bytes_before'] = result['bytes_after'] = os.path.getsize(path)
+        with Image.open(path) as image:
+            result['size'] = list(image.size)
+            crop_box = get_crop_box(image)
+
+            if crop_box is None:
+                result['status'] = 'blank'
+            elif crop_box == (0, 0, *image.size):
+                result['status'] = 'tight'
+                result['crop'] = list(crop_box)
+            else:
+                result['status'] = 'cropped'
+                result['crop'] = list(crop_box)
+                if not dry_run:
+                    image = crop_image(image)
+        
+        if result['status'] == 'cropped' and not dry_run:
+            image.save(path)
+            result['bytes_after'] = os.path.getsize(path)
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f'{type(e).__name__}: {e}'
+    
+    return result
+
+def crop_files(files: list[str], dry_run: bool = False, jobs: int | None = None) -> Iterator[dict]:
+    """
+    Crop files on a process pool with `jobs` workers (all cores if `None`,
+    in process if `1`), giving back each result as it's done.
+
+    Only a few files per worker are queued at a time, so the futures don't
+    pile up on big folders.
+    """
+    if jobs == 1:
+        for file in files:
+            yield crop_file(file, dry_run)
+        return
+    
+    with ProcessPoolExecutor(max_workers = jobs) as executor:
+        pending = iter(files)
+        futures = set()
+
+        def submit_next():
+            file = next(pending, None)
+            if file is not None:
+                futures.add(executor.submit(crop_file, file, dry_run))
+
+        for _ in range((jobs or os.cpu_count() or 1) * 4):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when = FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                submit_next()
+                yield future.result()
 
+def main():
     argparser = argparse.ArgumentParser(
         description = 'Crop images'
     )
@@ -29,21 +126,64 @@ if __name__ == "__main__":
         help = 'Input file(s) to crop',
     )
 
+    argparser.add_argument(
+        '-j', '--jobs',
+        type = int,
+        default = None,
+        help = 'Number of processes to crop with (defaults to all cores)',
+    )
+
+    argparser.add_argument(
+        '-n', '--dry-run',
+        action = 'store_true',
+        help = "Only print the crop boxes as json lines, don't save anything",
+    )
+
     args = argparser.parse_args()
 
     files: list[str] = []
 
     for file in args.files:
-        files.extend(glob(file))
+        files.extend(glob(file, recursive = True))
 
     if len(files) == 0:
         print('no files to crop')
+        return
+    
+    # keep stdout as pure json lines in dry run mode
+    log = sys.stderr if args.dry_run else sys.stdout
     
-    for file in files:
-        try:
-            image = Image.open(file)
-            image = crop_image(image)
-            image.save(file)
-        except Exception as e:
-            print(e)
+    counts = {
+        'cropped': 0,
+        'tight': 0,
+        'blank': 0,
+        'error': 0,
+    }
+    bytes_saved = 0
+    start = time.perf_counter()
 
+    for result in crop_files(files, args.dry_run, args.jobs):
+        counts[result['status']] += 1
+        bytes_saved += result['bytes_before'] - result['bytes_after']
+
+        if args.dry_run:
+            print(json.dumps(result), flush = True)
+        elif result['status'] == 'error':
+            print(f'{result["file"]}: {result["error"]}', file = log, flush = True)
+        elif result['status'] == 'cropped':
+            print(f'{result["file"]}: {result["size"]} -> {result["crop"]}', file = log, flush = True)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f'{len(files)} files in {elapsed:.2f}s ({len(files) / elapsed:.1f} files/s): ' +
+        f'{counts["cropped"]} cropped, {counts["tight"]} already tight, ' +
+        f'{counts["blank"]} blank, {counts["error"]} failed, ' +
+        f'{bytes_saved} bytes saved',
+        file = log,
+    )
+
+    if counts['error']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+from fnmatch import fnmatchcase
+from glob import glob
+import io
+import os
+import pathlib
+import pickle
+from typing import TYPE_CHECKING, BinaryIO, Iterable
+import xml.etree.ElementTree as ET
+
+if TYPE_CHECKING:
+    from luna_kit.ark import ARK
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+
+def normalize_game_path(path: str) -> str:
+    path = pathlib.PurePath(path).as_posix()
+    if path.startswith('./'):
+        path = path[2:]
+    return path
+
+def match_game_path(path: str, pattern: str) -> bool:
+    """
+    Match a path like `glob` does: `*` and `?` don't match `/`, and names
+    starting with `.` are only matched by patterns starting with `.`.
+    """
+    parts = path.split('/')
+    pattern_parts = pattern.split('/')
+    if len(parts) != len(pattern_parts):
+        return False
+
+    return all(
+        fnmatchcase(part, pattern_part) and (not part.startswith('.') or pattern_part.startswith('.'))
+        for part, pattern_part in zip(parts, pattern_parts)
+    )
+
+def filter_categories(file: BinaryIO, categories: Iterable[str]) -> io.BytesIO:
+    """
+    Stream gameobjectdata.xml and only keep the categories (by their `ID`)
+    we want, so the parser doesn't have to build everything else. Anything
+    else gets thrown away as soon as it's parsed, so memory only grows with
+    the categories that are kept.
+
+    The game's xml isn't always valid. With lxml installed, this recovers
+    from broken xml like the lenient parser does. Otherwise (or if it can't
+    recover) it raises `ET.ParseError`, so the whole file can be parsed
+    instead.
+
+    Returns:
+        io.BytesIO: The xml with just those categories.
+    """
+    categories = set(categories)
+
+    etree = ET
+    options = {}
+    if lxml_etree is not None:
+        etree = lxml_etree
+        options = {'recover': True, 'huge_tree': True}
+
+    try:
+        return _filter_categories(etree, file, categories, options)
+    except Exception as e:
+        if lxml_etree is not None and isinstance(e, lxml_etree.LxmlError):
+            raise ET.ParseError(str(e)) from e
+        raise
+
+def _filter_categories(etree, file: BinaryIO, categories: set[str], options: dict) -> io.BytesIO:
+    root = None
+    result = None
+    depth = 0
+    keep = False
+
+    for event, element in etree.iterparse(file, events = ('start', 'end'), **options):
+        if event == 'start':
+            if depth == 0:
+                root = element
+                result = etree.Element(root.tag, dict(root.attrib))
+            elif depth == 1:
+                keep = element.get('ID') in categories
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1:
+            root.remove(element)
+            if keep:
+                result.append(element)
+        elif depth > 1 and not keep:
+            element.clear()
+
+    if result is None:
+        raise ET.ParseError('no root element')
+
+    return io.BytesIO(etree.tostring(result, encoding = 'utf-8'))
+
+
+class GameFolder:
+    # every file already has a real path
+    has_paths = True
+
+    def __init__(self, folder: str) -> None:
+        """
+        Game files that have already been extracted to a folder.
+        """
+        self.folder = folder
+
+    def get_path(self, path: str) -> str:
+        return os.path.join(self.folder, path)
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(self.get_path(path))
+
+    def stat(self, path: str) -> tuple[int, float]:
+        stat = os.stat(self.get_path(path))
+        return stat.st_size, stat.st_mtime
+
+    def glob(self, pattern: str) -> list[str]:
+        return [
+            normalize_game_path(os.path.relpath(path, self.folder))
+            for path in glob(os.path.join(self.folder, pattern))
+        ]
+
+    def read(self, path: str) -> bytes:
+        with self.open(path) as file:
+            return file.read()
+
+    def open(self, path: str) -> BinaryIO:
+        return open(self.get_path(path), 'rb')
+
+
+class ArkFiles:
+    INDEX_VERSION = 1
+    # files only get a real path when they're extracted
+    has_paths = False
+
+    def __init__(self, archives: list[str], cache_folder: str = '.cache') -> None:
+        """
+        Game files read straight out of the .ark archives, so the game doesn't
+        have to be extracted first.
+
+        The index of which archive every file is in (with its offset and
+        size) is built once and cached in the cache folder, and only rebuilt
+        for archives that changed. If a file is in more than one archive, the
+        one from the last archive wins, so patch archives should come last.
+
+        Each archive is only parsed once, the first time something is read
+        from it. Anything that needs a real path (like loc files) gets
+        extracted on its own into `cache_folder/ark-files`. Textures are read
+        into memory instead.
+        """
+        self.archives = [os.path.abspath(archive) for archive in archives]
+        self.cache_folder = cache_folder
+        self.index_path = os.path.join(self.cache_folder, 'ark-index.pickle')
+        self.extract_folder = os.path.join(self.cache_folder, 'ark-files')
+
+        # path: (archive, offset, size)
+        self.index: dict[str, tuple[str, int, int]] = {}
+        # archive: (size, mtime)
+        self.archive_stats: dict[str, tuple[int, float]] = {}
+
+        self._arks: dict[str, 'ARK'] = {}
+        # archive: {offset: file metadata}
+        self._metadata: dict[str, dict[int, object]] = {}
+
+        self.load_index()
+
+    @classmethod
+    def from_folder(cls, folder: str, cache_folder: str = '.cache'):
+        return cls(sorted(glob(os.path.join(folder, '*.ark'))), cache_folder)
+
+    def get_archive_stat(self, archive: str) -> tuple[int, float]:
+        stat = os.stat(archive)
+        return stat.st_size, stat.st_mtime
+
+    def load_index(self):
+        cached = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as file:
+                cached = pickle.load(file)
+            if cached.get('version') != self.INDEX_VERSION:
+                cached = {}
+
+        cached_archives: dict[str, dict] = cached.get('archives', {})
+        changed = False
+
+        for archive in self.archives:
+            stat = self.archive_stats[archive] = self.get_archive_stat(archive)
+
+            entry = cached_archives.get(archive)
+            if entry is None or tuple(entry['stat']) != stat:
+                changed = True
+                files = self.read_archive_index(archive)
+                # anything extracted from the old version of the archive is stale
+                for path in set(files) | set(entry['files'] if entry else []):
+                    self.remove_extracted(path)
+                cached_archives[archive] = {
+                    'stat': stat,
+                    'files': files,
+                }
+
+            for path, (offset, size) in cached_archives[archive]['files'].items():
+                self.index[path] = (archive, offset, size)
+
+        if changed or set(cached_archives) != set(self.archives):
+            os.makedirs(self.cache_folder, exist_ok = True)
+            with open(self.index_path, 'wb') as file:
+                pickle.dump({
+                    'version': self.INDEX_VERSION,
+                    'archives': {archive: cached_archives[archive] for archive in self.archives},
+                }, file)
+
+    def open_archive(self, archive: str) -> 'ARK':
+        if archive not in self._arks:
+            # only needed once there are archives to read
+            from luna_kit.ark import ARK
+
+            ark = ARK(archive)
+            self._arks[archive] = ark
+            self._metadata[archive] = {metadata.file_location: metadata for metadata in ark.files}
+
+        return self._arks[archive]
+
+    def read_archive_index(self, archive: str) -> dict[str, tuple[int, int]]:
+        ark = self.open_archive(archive)
+        return {
+            normalize_game_path(metadata.full_path): (metadata.file_location, metadata.encrypted_filesize)
+            for metadata in ark.files
+        }
+
+    def exists(self, path: str) -> bool:
+        return normalize_game_path(path) in self.index
+
+    def glob(self, pattern: str) -> list[str]:
+        pattern = normalize_game_path(pattern)
+        return [path for path in self.index if match_game_path(path, pattern)]
+
+    def stat(self, path: str) -> tuple[int, float]:
+        """
+        The size of the file in its archive, and the mtime of the archive.
+        """
+        archive, offset, size = self.index[normalize_game_path(path)]
+        return size, self.archive_stats[archive][1]
+
+    def get_entry_key(self, path: str) -> list:
+        """
+        Something that changes whenever the file does, without reading it: the
+        archive it's in, where it is in there, and the archive's size and
+        mtime.
+        """
+        archive, offset, size = self.index[normalize_game_path(path)]
+        return [archive, offset, size, *self.archive_stats[archive]]
+
+    def read(self, path: str) -> bytes:
+        path = normalize_game_path(path)
+        if path not in self.index:
+            raise FileNotFoundError(f'{path} is not in any ark')
+
+        archive, offset, size = self.index[path]
+        ark = self.open_archive(archive)
+        return ark.read_file(self._metadata[archive][offset]).data
+
+    def open(self, path: str) -> BinaryIO:
+        return io.BytesIO(self.read(path))
+
+    def remove_extracted(self, path: str):
+        file_path = os.path.join(self.extract_folder, path)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def get_path(self, path: str) -> str:
+        """
+        Extract a single file (if it hasn't been already) and get the path to
+        it. Extracted files are removed when their archive changes.
+        """
+        path = normalize_game_path(path)
+        file_path = os.path.join(self.extract_folder, path)
+        # files that aren't in the arks just don't exist at the path
+        if path in self.index and not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok = True)
+            with open(file_path, 'wb') as file:
+                file.write(self.read(path))
+
+        return file_path
+
+
+def open_game_files(folder: str, cache_folder: str = '.cache') -> GameFolder | ArkFiles:
+    """
+    Use the .ark archives in the folder if the game hasn't been extracted
+    there.
+    """
+    if not os.path.exists(os.path.join(folder, 'gameobjectdata.xml')) and glob(os.path.join(folder, '*.ark')):
+        return ArkFiles.from_folder(folder, cache_folder)
+
+    return GameFolder(folder)
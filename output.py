@@ -0,0 +1,269 @@
+from collections import Counter
+from glob import glob
+import gzip
+import hashlib
+import json
+import os
+from typing import Any
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# fields that go in the index shard, so pages can list and filter items
+# without loading anything else
+INDEX_FIELDS = [
+    'index',
+    'location',
+    'image',
+    'tags',
+]
+
+# fields that are {language: value} dicts, these go in the language shards
+STRING_FIELDS = [
+    'name',
+    'description',
+    'alt_name',
+]
+
+
+def dump_json(data: Any, compact: bool = True) -> bytes:
+    if compact:
+        return json.dumps(data, ensure_ascii = False, separators = (',', ':')).encode('utf-8')
+
+    return json.dumps(data, ensure_ascii = False, indent = 2).encode('utf-8')
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """
+    Only write the file if the contents are different, so unchanged files keep
+    their mtime.
+
+    It's written next to the file and then moved over it, so other processes
+    (like the image workers sharing the image store) never see half a file.
+    """
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as file:
+            if file.read() == data:
+                return False
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+    os.replace(temp_path, path)
+    return True
+
+def compress(data: bytes) -> dict[str, bytes]:
+    """
+    Get the precompressed versions of a file, by extension. Brotli is only
+    used if it's installed.
+
+    gzip gets a fixed mtime so the output is the same every time.
+    """
+    result = {
+        '.gz': gzip.compress(data, compresslevel = 9, mtime = 0),
+    }
+    if brotli is not None:
+        result['.br'] = brotli.compress(data, quality = 11)
+
+    return result
+
+def write_compressed(path: str, data: bytes) -> dict[str, int]:
+    """
+    Write a file with its .gz and .br versions next to it.
+
+    Returns:
+        dict[str, int]: Size of each file written by path.
+    """
+    sizes = {path: len(data)}
+    write_if_changed(path, data)
+    for extension, compressed in compress(data).items():
+        write_if_changed(path + extension, compressed)
+        sizes[path + extension] = len(compressed)
+
+    return sizes
+
+def get_languages(game_data: dict) -> list[str]:
+    languages = set()
+    for category in game_data.get('categories', {}).values():
+        languages.update(category.get('name', {}))
+        for item in category.get('items', {}).values():
+            for field in STRING_FIELDS:
+                if isinstance(item.get(field), dict):
+                    languages.update(item[field])
+
+    return sorted(languages)
+
+def split_game_data(game_data: dict) -> tuple[dict, dict[str, dict], dict[str, dict]]:
+    """
+    Split game data into the index, the strings for each language, and the
+    details for each category.
+    """
+    languages = get_languages(game_data)
+
+    index = {'categories': {}}
+    strings = {language: {'categories': {}} for language in languages}
+    details = {}
+
+    for category_id, category in game_data.get('categories', {}).items():
+        index_items = {}
+        category_strings = {}
+        for language in languages:
+            category_strings[language] = strings[language]['categories'][category_id] = {
+                'name': category.get('name', {}).get(language, ''),
+                'items': {},
+            }
+        category_details = {
+            key: value for key, value in category.items() if key not in ['name', 'items']
+        }
+        category_details['items'] = {}
+
+        for item_id, item in category.get('items', {}).items():
+            index_items[item_id] = {field: item[field] for field in INDEX_FIELDS if field in item}
+
+            for language in languages:
+                item_strings = {}
+                for field in STRING_FIELDS:
+                    if isinstance(item.get(field), dict) and language in item[field]:
+                        item_strings[field] = item[field][language]
+                category_strings[language]['items'][item_id] = item_strings
+
+            category_details['items'][item_id] = {
+                key: value for key, value in item.items() if key not in INDEX_FIELDS and key not in STRING_FIELDS
+            }
+
+        index['categories'][category_id] = {'items': index_items}
+        details[category_id] = category_details
+
+    return index, strings, details
+
+def write_shards(game_data: dict, folder: str, compressed: bool = False) -> dict:
+    """
+    Write game data split up into small files, so the site only has to load
+    what it needs:
+
+    - `index.json` has every item id with its index, location, images and tags.
+    - `strings/{language}.json` has the names and descriptions in one language.
+    - `categories/{category}.json` has the rest of the details for a category.
+    - `manifest.json` lists all of them with their size and hash.
+
+    With `compressed`, each shard also gets .gz and .br versions.
+
+    Shards that weren't written this time (like the strings of a language
+    that's gone, or .gz and .br versions without `compressed`) are removed,
+    so they don't stay around looking current.
+
+    Returns:
+        dict: The manifest.
+    """
+    index, strings, details = split_game_data(game_data)
+
+    manifest = {
+        'file_version': game_data.get('file_version'),
+        'game_version': game_data.get('game_version'),
+        'content_version': game_data.get('content_version'),
+        'index': None,
+        'strings': {},
+        'categories': {},
+    }
+
+    written = set()
+
+    def write(path: str, data: Any) -> dict:
+        data = dump_json(data)
+        if compressed:
+            written.update(map(os.path.normpath, write_compressed(os.path.join(folder, path), data)))
+        else:
+            write_if_changed(os.path.join(folder, path), data)
+            written.add(os.path.normpath(os.path.join(folder, path)))
+        return {
+            'path': path,
+            'size': len(data),
+            # the hash can be used to bust caches
+            'hash': hashlib.sha256(data).hexdigest()[:16],
+        }
+
+    manifest['index'] = write('index.json', index)
+    for language, language_strings in strings.items():
+        manifest['strings'][language] = write(f'strings/{language.replace(" ", "_")}.json', language_strings)
+    for category_id, category_details in details.items():
+        manifest['categories'][category_id] = write(f'categories/{category_id}.json', category_details)
+
+    for pattern in ['strings/*', 'categories/*', 'index.json.*']:
+        for path in glob(os.path.join(folder, pattern)):
+            if os.path.isfile(path) and os.path.normpath(path) not in written:
+                os.remove(path)
+
+    write_if_changed(os.path.join(folder, 'manifest.json'), dump_json(manifest, compact = False))
+
+    return manifest
+
+def intern_strings(game_data: dict) -> dict:
+    """
+    Get a copy of the game data where every translated string is stored once
+    in a string table, and items point to it by index instead. The most used
+    strings get the smallest indexes.
+
+    Every field in `string_table.fields` (on categories and items) becomes a
+    list with a value for each language in `string_table.languages`, which is
+    either the index of the string, a list of indexes (for `alt_name`), or
+    `null` if there's nothing for that language.
+
+    See game-data-format.json5 for how to decode it.
+    """
+    languages = get_languages(game_data)
+
+    def get_translations():
+        for category in game_data.get('categories', {}).values():
+            yield category.get('name', {})
+            for item in category.get('items', {}).values():
+                for field in STRING_FIELDS:
+                    if isinstance(item.get(field), dict):
+                        yield item[field]
+
+    counts = Counter()
+    for translation in get_translations():
+        for value in translation.values():
+            if isinstance(value, list):
+                counts.update(value)
+            else:
+                counts[value] += 1
+
+    strings = [string for string, count in counts.most_common()]
+    string_indexes = {string: index for index, string in enumerate(strings)}
+
+    def encode(translation: dict) -> list:
+        result = []
+        for language in languages:
+            value = translation.get(language)
+            if value is None:
+                result.append(None)
+            elif isinstance(value, list):
+                result.append([string_indexes[string] for string in value])
+            else:
+                result.append(string_indexes[value])
+        return result
+
+    result = {
+        key: value for key, value in game_data.items() if key != 'categories'
+    }
+    result['string_table'] = {
+        'languages': languages,
+        'fields': STRING_FIELDS,
+        'strings': strings,
+    }
+    result['categories'] = {}
+
+    for category_id, category in game_data.get('categories', {}).items():
+        interned_category = dict(category)
+        interned_category['name'] = encode(category.get('name', {}))
+        interned_category['items'] = {}
+        for item_id, item in category.get('items', {}).items():
+            interned_category['items'][item_id] = {
+                key: encode(value) if key in STRING_FIELDS and isinstance(value, dict) else value
+                for key, value in item.items()
+            }
+        result['categories'][category_id] = interned_category
+
+    return result
@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+
+def get_palette_image(image: Image.Image) -> Image.Image | None:
+    """
+    Convert an RGBA image to a palette image with the exact same colours, with
+    the alpha in the palette's transparency.
+
+    Returns `None` if it has more than 256 colours.
+    """
+    if image.getcolors(256) is None:
+        return None
+
+    pixels = np.ascontiguousarray(np.asarray(image, dtype = np.uint8))
+    colors, indexes = np.unique(pixels.view(np.uint32).ravel(), return_inverse = True)
+    colors = colors.view(np.uint8).reshape(-1, 4)
+
+    palette_image = Image.frombytes('P', image.size, indexes.astype(np.uint8).tobytes())
+    palette_image.putpalette(colors[:, :3].tobytes())
+    if (colors[:, 3] != 255).any():
+        palette_image.info['transparency'] = colors[:, 3].tobytes()
+
+    return palette_image
+
+def get_png_candidates(image: Image.Image) -> list[Image.Image]:
+    """
+    Get all the lossless ways to store an RGBA image, without any of its
+    metadata.
+    """
+    candidates = [image.copy()]
+    candidates[0].info = {}
+
+    if image.getchannel('A').getextrema() == (255, 255):
+        candidates.append(image.convert('RGB'))
+        candidates[-1].info = {}
+
+    palette_image = get_palette_image(image)
+    if palette_image is not None:
+        candidates.append(palette_image)
+
+    return candidates
+
+def optimize_png(image: Image.Image) -> bytes:
+    """
+    Get the smallest lossless PNG encoding of an RGBA image. This tries it as
+    RGBA, as RGB if it's opaque, and as a palette if it fits in 256 colours,
+    all with the best compression, and without metadata.
+    """
+    best = None
+    for candidate in get_png_candidates(image):
+        buffer = io.BytesIO()
+        candidate.save(buffer, 'png', optimize = True)
+        data = buffer.getvalue()
+        if best is None or len(data) < len(best):
+            best = data
+
+    return best
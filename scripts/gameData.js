@@ -20,7 +20,7 @@ export default class GameData {
             includeUnused: true,
             ...options,
         }
-        this.gameData = loadJSON(this.gameDataPath)
+        this.gameData = decodeStringTable(loadJSON(this.gameDataPath))
         this._language = 'english'
 
         this.languages = this.gameData.languages
@@ -238,3 +238,39 @@ export default class GameData {
         }
     }
 }
+
+// Turn game data saved with a string table (see game-data-format.json5) back
+// into the normal format. Strings are shared, so this doesn't copy them.
+export function decodeStringTable(gameData) {
+    if (typeof gameData.string_table == 'undefined') {
+        return gameData
+    }
+
+    let { languages, fields, strings } = gameData.string_table
+
+    function decode(value) {
+        let translation = {}
+        languages.forEach((language, index) => {
+            let stringIndex = value[index]
+            if (stringIndex == null) {
+                return
+            }
+            translation[language] = Array.isArray(stringIndex) ? stringIndex.map((i) => strings[i]) : strings[stringIndex]
+        })
+        return translation
+    }
+
+    for (let category of Object.values(gameData.categories)) {
+        category.name = decode(category.name)
+        for (let item of Object.values(category.items)) {
+            for (let field of fields) {
+                if (Array.isArray(item[field])) {
+                    item[field] = decode(item[field])
+                }
+            }
+        }
+    }
+
+    delete gameData.string_table
+    return gameData
+}
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import pickle
+from typing import Any
+
+# bump this when what goes in the snapshot changes
+SNAPSHOT_VERSION = 2
+
+
+def hash_file(path: str) -> str:
+    hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(1024 * 1024):
+            hash.update(chunk)
+
+    return hash.hexdigest()
+
+
+class SnapshotObject(dict):
+    def __init__(self, id: str, category: str, components: dict) -> None:
+        """
+        A game object without anything from the parser attached, so it can be
+        pickled on its own.
+        """
+        super().__init__(components)
+        self.id = id
+        self.category = category
+
+
+class GameDataSnapshot:
+    def __init__(
+        self,
+        categories: dict[str, dict[str, SnapshotObject]],
+        shopdata: dict[str, dict],
+    ) -> None:
+        """
+        Just the categories (and their shop data) we use from a
+        `GameObjectData`. It can be used in place of one, as long as only
+        those categories are used.
+        """
+        self.categories = categories
+        self.shopdata = shopdata
+
+    @classmethod
+    def from_gameobjectdata(cls, gameobjectdata, categories: list[str]):
+        snapshot_categories = {}
+        shopdata = {}
+        for category in categories:
+            objects = snapshot_categories[category] = {}
+            for id, game_object in gameobjectdata.get(category, {}).items():
+                objects[id] = SnapshotObject(id, category, game_object)
+                object_shopdata = gameobjectdata.get_object_shopdata(id)
+                if object_shopdata is not None:
+                    shopdata[id] = object_shopdata
+
+        return cls(snapshot_categories, shopdata)
+
+    def __getitem__(self, category: str) -> dict[str, SnapshotObject]:
+        return self.categories[category]
+
+    def __contains__(self, category: str) -> bool:
+        return category in self.categories
+
+    def get(self, category: str, default = None):
+        return self.categories.get(category, default)
+
+    def keys(self):
+        return self.categories.keys()
+
+    def get_object_shopdata(self, id: str) -> dict | None:
+        return self.shopdata.get(id)
+
+
+class SnapshotCache:
+    def __init__(self, cache_folder: str) -> None:
+        """
+        The parsed game data from the last run, so reruns on the same game
+        files don't have to parse the xml and loc files again.
+
+        The key is made from the content hashes of the source files. Hashes
+        are reused while a file's size and mtime stay the same, so checking
+        the key doesn't have to read them every time either.
+        """
+        self.cache_folder = cache_folder
+        self.meta_path = os.path.join(self.cache_folder, 'snapshot.json')
+        self.data_path = os.path.join(self.cache_folder, 'snapshot.pickle')
+
+        self.meta = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding = 'utf-8') as file:
+                self.meta = json.load(file)
+            if self.meta.get('version') != SNAPSHOT_VERSION:
+                self.meta = {}
+
+        self.files: dict[str, dict] = {}
+
+    def hash_files(self, paths: list[str]) -> dict[str, str]:
+        old_files = self.meta.get('files', {})
+        hashes = {}
+        for path in paths:
+            key = os.path.abspath(path)
+            stat = os.stat(path)
+            entry = old_files.get(key)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+                entry = {
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime,
+                    'hash': hash_file(path),
+                }
+
+            self.files[key] = entry
+            hashes[key] = entry['hash']
+
+        return hashes
+
+    def get_key(self, paths: list[str], *extra: Any) -> str:
+        """
+        Get the key for these source files. Anything else the parsed data
+        depends on (like the content version) goes in `extra`.
+        """
+        return hashlib.sha256(json.dumps([
+            SNAPSHOT_VERSION,
+            sorted(self.hash_files(paths).items()),
+            extra,
+        ]).encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Any | None:
+        if self.meta.get('key') != key or not os.path.exists(self.data_path):
+            return None
+
+        try:
+            with open(self.data_path, 'rb') as file:
+                return pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def save(self, key: str, data: Any):
+        os.makedirs(self.cache_folder, exist_ok = True)
+        # the key is only written after the data, so a half written snapshot
+        # never matches
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+        
+        with open(self.data_path, 'wb') as file:
+            pickle.dump(data, file, protocol = pickle.HIGHEST_PROTOCOL)
+
+        self.meta = {
+            'version': SNAPSHOT_VERSION,
+            'key': key,
+            'files': self.files,
+        }
+        with open(self.meta_path, 'w', encoding = 'utf-8') as file:
+            json.dump(self.meta, file, indent = 2)
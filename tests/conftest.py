@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from wiki_stub import run_stub_wiki
+
+
+@pytest.fixture
+def wiki():
+    with run_stub_wiki() as wiki:
+        yield wiki
@@ -0,0 +1,84 @@
+from PIL import Image, ImageDraw
+
+from crop import crop_file, crop_files, crop_image, get_crop_box
+
+
+def save_image(path, image: Image.Image) -> str:
+    path = str(path)
+    image.save(path)
+    return path
+
+def padded_image() -> Image.Image:
+    image = Image.new('RGBA', (40, 30), (0, 0, 0, 0))
+    ImageDraw.Draw(image).rectangle((5, 4, 24, 19), fill = (255, 0, 0, 255))
+    return image
+
+
+def test_crop_box_of_padded_image():
+    assert get_crop_box(padded_image()) == (5, 4, 25, 20)
+
+def test_crop_box_of_transparent_image():
+    assert get_crop_box(Image.new('RGBA', (10, 10), (0, 0, 0, 0))) is None
+
+def test_crop_box_of_opaque_image():
+    assert get_crop_box(Image.new('RGBA', (10, 12), (10, 20, 30, 255))) == (0, 0, 10, 12)
+    assert get_crop_box(Image.new('RGB', (10, 12), (10, 20, 30))) == (0, 0, 10, 12)
+
+def test_crop_box_with_opaque_background():
+    image = Image.new('RGBA', (20, 20), (255, 255, 255, 255))
+    ImageDraw.Draw(image).rectangle((2, 3, 9, 9), fill = (0, 0, 0, 128))
+    assert get_crop_box(image) == (2, 3, 10, 10)
+
+def test_crop_image_keeps_opaque_image():
+    image = Image.new('RGBA', (10, 12), (10, 20, 30, 255))
+    assert crop_image(image).size == (10, 12)
+
+
+def test_crop_file_cropped(tmp_path):
+    path = save_image(tmp_path / 'padded.png', padded_image())
+    result = crop_file(path)
+    assert result['status'] == 'cropped'
+    assert result['crop'] == [5, 4, 25, 20]
+    with Image.open(path) as image:
+        assert image.size == (20, 16)
+
+def test_crop_file_dry_run(tmp_path):
+    path = save_image(tmp_path / 'padded.png', padded_image())
+    result = crop_file(path, dry_run = True)
+    assert result['status'] == 'cropped'
+    with Image.open(path) as image:
+        assert image.size == (40, 30)
+
+def test_crop_file_blank(tmp_path):
+    path = save_image(tmp_path / 'blank.png', Image.new('RGBA', (10, 10), (0, 0, 0, 0)))
+    result = crop_file(path)
+    assert result['status'] == 'blank'
+    assert result['crop'] is None
+
+def test_crop_file_opaque_is_tight(tmp_path):
+    path = save_image(tmp_path / 'opaque.png', Image.new('RGBA', (10, 12), (10, 20, 30, 255)))
+    result = crop_file(path)
+    assert result['status'] == 'tight'
+    assert result['crop'] == [0, 0, 10, 12]
+    assert result['bytes_before'] == result['bytes_after']
+
+def test_crop_file_error(tmp_path):
+    path = tmp_path / 'broken.png'
+    path.write_bytes(b'not a png')
+    result = crop_file(str(path))
+    assert result['status'] == 'error'
+    assert result['error'] is not None
+
+def test_crop_files(tmp_path):
+    paths = [save_image(tmp_path / f'padded_{index}.png', padded_image()) for index in range(20)]
+    paths.append(save_image(tmp_path / 'blank.png', Image.new('RGBA', (10, 10), (0, 0, 0, 0))))
+
+    results = list(crop_files(paths, dry_run = True, jobs = 2))
+
+    assert sorted(result['file'] for result in results) == sorted(paths)
+    assert sum(result['status'] == 'cropped' for result in results) == 20
+    assert sum(result['status'] == 'blank' for result in results) == 1
+
+def test_crop_files_in_process(tmp_path):
+    path = save_image(tmp_path / 'padded.png', padded_image())
+    assert [result['status'] for result in crop_files([path], jobs = 1)] == ['cropped']
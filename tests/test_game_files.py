@@ -0,0 +1,131 @@
+import io
+import os
+from xml.etree import ElementTree as ET
+
+import pytest
+
+import game_files
+from game_files import ArkFiles, GameFolder, filter_categories, match_game_path
+
+FILES = [
+    'gameobjectdata.xml',
+    'english.loc',
+    'french.loc',
+    '.hidden.loc',
+    'ponies/Pony_Twilight_icon.pvr',
+    'ponies/Pony_Twilight_icon_alpha.pvr',
+    'ponies/shop/Pony_Twilight.png',
+    'data/english.loc',
+]
+
+# archives don't have folders, so these only match files
+PATTERNS = [
+    '*.loc',
+    '*.xml',
+    'ponies/*.*',
+    'ponies/*.pvr',
+    'ponies/*/*.png',
+    '*/*.loc',
+    '**/*.loc',
+    'ponies/Pony_Twilight_icon?pvr',
+    '[ef]*.loc',
+    '.*.loc',
+    'missing/*',
+]
+
+
+@pytest.fixture
+def game_folder(tmp_path):
+    for path in FILES:
+        file_path = tmp_path / 'game' / path
+        file_path.parent.mkdir(parents = True, exist_ok = True)
+        file_path.write_bytes(path.encode('utf-8'))
+    return GameFolder(str(tmp_path / 'game'))
+
+@pytest.fixture
+def ark_files(tmp_path):
+    ark_files = ArkFiles([], str(tmp_path / 'cache'))
+    archive = str(tmp_path / 'main.ark')
+    ark_files.archive_stats[archive] = (1000, 1234.5)
+    for offset, path in enumerate(FILES):
+        ark_files.index[path] = (archive, offset, len(path))
+    return ark_files
+
+
+@pytest.mark.parametrize('path, pattern, match', [
+    ('english.loc', '*.loc', True),
+    ('data/english.loc', '*.loc', False),
+    ('data/english.loc', '*/*.loc', True),
+    ('data/english.loc', 'data/*', True),
+    ('data/english.loc', 'data?english.loc', False),
+    ('.hidden.loc', '*.loc', False),
+    ('.hidden.loc', '.*', True),
+    ('English.loc', 'english.loc', False),
+])
+def test_match_game_path(path, pattern, match):
+    assert match_game_path(path, pattern) is match
+
+@pytest.mark.parametrize('pattern', PATTERNS)
+def test_ark_glob_matches_folder_glob(game_folder, ark_files, pattern):
+    assert sorted(ark_files.glob(pattern)) == sorted(game_folder.glob(pattern))
+
+def test_ark_stat(ark_files):
+    assert ark_files.stat('./ponies/Pony_Twilight_icon.pvr') == (len('ponies/Pony_Twilight_icon.pvr'), 1234.5)
+
+def test_ark_entry_key(ark_files, tmp_path):
+    # from the index, nothing gets read or extracted
+    assert ark_files.get_entry_key('english.loc') == [str(tmp_path / 'main.ark'), 1, len('english.loc'), 1000, 1234.5]
+    assert not os.path.exists(ark_files.extract_folder)
+
+def test_folder_read_and_stat(game_folder):
+    assert game_folder.read('ponies/shop/Pony_Twilight.png') == b'ponies/shop/Pony_Twilight.png'
+    size, mtime = game_folder.stat('english.loc')
+    assert size == len('english.loc')
+    assert mtime == os.path.getmtime(game_folder.get_path('english.loc'))
+
+
+GAMEOBJECTDATA = b"""<?xml version="1.0" encoding="utf-8"?>
+<GameObjects Version="1">
+    <Category ID="Pony">
+        <GameObject ID="Pony_Twilight"><Name Unlocal="Twilight" /></GameObject>
+    </Category>
+    <Category ID="Decore">
+        <GameObject ID="Decore_Tree"><Name Unlocal="Tree" /></GameObject>
+    </Category>
+    <Category ID="HiddenPony">
+        <GameObject ID="Pony_Shadow" />
+    </Category>
+</GameObjects>
+"""
+
+# the kind of mistakes the game's xml has in categories we don't use
+MALFORMED = GAMEOBJECTDATA.replace(
+    b'<Name Unlocal="Tree" />',
+    b'<Name Unlocal="Tree & Bush">Rock & Roll</Name>',
+)
+
+def category_ids(file: io.BytesIO) -> list[str]:
+    return [category.get('ID') for category in ET.parse(file).getroot()]
+
+def test_filter_categories():
+    result = filter_categories(io.BytesIO(GAMEOBJECTDATA), ['Pony', 'HiddenPony'])
+    root = ET.parse(result).getroot()
+
+    assert root.tag == 'GameObjects'
+    assert root.get('Version') == '1'
+    assert [category.get('ID') for category in root] == ['Pony', 'HiddenPony']
+    assert root.find('Category/GameObject/Name').get('Unlocal') == 'Twilight'
+
+@pytest.mark.skipif(game_files.lxml_etree is None, reason = 'needs lxml')
+def test_filter_categories_recovers_from_malformed_xml():
+    result = filter_categories(io.BytesIO(MALFORMED), ['Pony', 'HiddenPony'])
+    assert category_ids(result) == ['Pony', 'HiddenPony']
+
+def test_filter_categories_strict_raises_parse_error(monkeypatch):
+    monkeypatch.setattr(game_files, 'lxml_etree', None)
+    with pytest.raises(ET.ParseError):
+        filter_categories(io.BytesIO(MALFORMED), ['Pony', 'HiddenPony'])
+
+def test_filter_categories_empty_file():
+    with pytest.raises(ET.ParseError):
+        filter_categories(io.BytesIO(b''), ['Pony'])
@@ -0,0 +1,54 @@
+import os
+
+from output import write_shards
+
+
+def make_game_data(languages: list[str]) -> dict:
+    return {
+        'file_version': 2,
+        'categories': {
+            'ponies': {
+                'name': {language: 'Ponies' for language in languages},
+                'items': {
+                    'Pony_Twilight': {
+                        'index': 0,
+                        'name': {language: 'Twilight' for language in languages},
+                    },
+                },
+            },
+        },
+    }
+
+def list_files(folder) -> list[str]:
+    return sorted(
+        os.path.relpath(os.path.join(root, name), folder).replace(os.sep, '/')
+        for root, folders, names in os.walk(folder)
+        for name in names
+    )
+
+
+def test_write_shards(tmp_path):
+    manifest = write_shards(make_game_data(['english', 'french']), str(tmp_path))
+
+    assert set(manifest['strings']) == {'english', 'french'}
+    assert list_files(tmp_path) == [
+        'categories/ponies.json',
+        'index.json',
+        'manifest.json',
+        'strings/english.json',
+        'strings/french.json',
+    ]
+
+def test_old_shards_are_removed(tmp_path):
+    write_shards(make_game_data(['english', 'french', 'brazilian portuguese']), str(tmp_path), compressed = True)
+    (tmp_path / 'other.json').write_text('{}')
+
+    write_shards(make_game_data(['english']), str(tmp_path))
+
+    assert list_files(tmp_path) == [
+        'categories/ponies.json',
+        'index.json',
+        'manifest.json',
+        'other.json',
+        'strings/english.json',
+    ]
@@ -0,0 +1,196 @@
+import pytest
+import requests
+
+from wiki import API_TITLES_LIMIT, parse_query_response
+from wiki_stub import check, make_checker, make_pages
+
+
+def test_batches_of_50_titles(wiki):
+    names = [f'Pony_{index}' for index in range(API_TITLES_LIMIT * 2 + 20)]
+    wiki.pages = {f'Pony {index}' for index in range(0, len(names), 2)}
+    pages = make_pages(wiki, names)
+
+    results = check(make_checker(wiki), pages)
+
+    assert sorted(len(titles) for titles in wiki.queries) == [20, API_TITLES_LIMIT, API_TITLES_LIMIT]
+    assert sorted(title for titles in wiki.queries for title in titles) == sorted(names)
+    assert wiki.heads == []
+    assert len(results) == len(pages)
+    for index, page in enumerate(pages):
+        assert page['result'] == {
+            'exists': index % 2 == 0,
+            'redirect': False,
+            'path': names[index],
+        }
+
+def test_same_title_is_only_queried_once(wiki):
+    wiki.pages = {'Twilight'}
+    pages = make_pages(wiki, ['Twilight', 'Twilight'])
+
+    check(make_checker(wiki), pages)
+
+    assert wiki.queries == [['Twilight']]
+    assert all(page['result']['exists'] for page in pages)
+
+def test_redirects(wiki):
+    wiki.pages = {'Twilight Sparkle'}
+    wiki.redirects = {
+        'Twilight': 'Twilight Sparkle',
+        'Old Page': 'Gone Page',
+    }
+    pages = make_pages(wiki, ['Twilight', 'Old_Page', 'Twilight_Sparkle'])
+
+    check(make_checker(wiki), pages)
+
+    results = {page['path']: page['result'] for page in pages}
+    assert results['Twilight'] == {'exists': True, 'redirect': True, 'path': 'Twilight'}
+    # a redirect to a missing page doesn't count
+    assert results['Old_Page'] == {'exists': False, 'redirect': False, 'path': 'Old_Page'}
+    assert results['Twilight_Sparkle'] == {'exists': True, 'redirect': False, 'path': 'Twilight_Sparkle'}
+
+def test_missing_titles(wiki):
+    wiki.pages = {'Applejack'}
+    pages = make_pages(wiki, ['Applejack', 'Nopony'])
+
+    results = check(make_checker(wiki), pages)
+
+    assert all(error is None for page, error in results)
+    assert pages[0]['result']['exists'] is True
+    assert pages[1]['result']['exists'] is False
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_api_errors_are_retried(wiki, status):
+    wiki.pages = {'Rarity'}
+    wiki.api_statuses = [status, status]
+    pages = make_pages(wiki, ['Rarity'])
+
+    results = check(make_checker(wiki, retries = 3), pages)
+
+    assert wiki.queries == [['Rarity']] * 3
+    assert wiki.heads == []
+    assert results == [(pages[0], None)]
+    assert pages[0]['result']['exists'] is True
+
+def test_api_errors_fall_back_to_head(wiki):
+    wiki.api_statuses = [500] * 3
+    wiki.head_status = {
+        'Rarity': 200,
+        'Rara': 301,
+    }
+    pages = make_pages(wiki, ['Rarity', 'Rara', 'Nopony'])
+
+    results = check(make_checker(wiki, retries = 2), pages)
+
+    # the first try and 2 retries
+    assert len(wiki.queries) == 3
+    assert sorted(wiki.heads) == ['Nopony', 'Rara', 'Rarity']
+    assert all(error is None for page, error in results)
+    assert pages[0]['result']['exists'] is True
+    assert pages[0]['result']['redirect'] is False
+    assert pages[1]['result']['exists'] is True
+    assert pages[1]['result']['redirect'] is True
+    assert pages[2]['result']['exists'] is False
+
+def test_head_errors_are_retried(wiki):
+    wiki.has_api = False
+    wiki.head_status = {'Spike': [503, 429, 200]}
+    pages = make_pages(wiki, ['Spike'])
+
+    check(make_checker(wiki, retries = 3), pages)
+
+    assert wiki.heads == ['Spike'] * 3
+    assert pages[0]['result']['exists'] is True
+
+def test_connection_errors_are_yielded(wiki):
+    pages = make_pages(wiki, ['Fluttershy'], name = 'other')
+    pages[0]['result']['exists'] = True
+    # nothing is listening there anymore
+    wiki.shutdown()
+    wiki.server_close()
+
+    results = check(make_checker(wiki, retries = 0), pages)
+
+    assert len(results) == 1
+    page, error = results[0]
+    assert isinstance(error, requests.ConnectionError)
+    # left alone when it couldn't be checked
+    assert pages[0]['result']['exists'] is True
+
+def test_timeouts_are_yielded(wiki):
+    wiki.delay = 1
+    pages = make_pages(wiki, ['Fluttershy'], name = 'other')
+
+    results = check(make_checker(wiki, retries = 0, timeout = 0.1), pages)
+
+    page, error = results[0]
+    # urllib3's retries wrap the timeout
+    assert isinstance(error, requests.RequestException)
+    assert 'timed out' in str(error)
+
+def test_wikis_without_api_use_head(wiki):
+    wiki.head_status = {'Spike': 200}
+    pages = make_pages(wiki, ['Spike', 'Nopony'], name = 'other')
+
+    check(make_checker(wiki), pages)
+
+    assert wiki.queries == []
+    assert sorted(wiki.heads) == ['Nopony', 'Spike']
+    assert pages[0]['result']['exists'] is True
+    assert pages[1]['result']['exists'] is False
+
+def test_requests_per_host_are_limited(wiki):
+    wiki.delay = 0.05
+    names = [f'Pony_{index}' for index in range(24)]
+    pages = make_pages(wiki, names, name = 'other')
+
+    check(make_checker(wiki, max_workers = 16, max_per_host = 3), pages)
+
+    assert len(wiki.heads) == len(names)
+    assert wiki.max_in_flight == 3
+    # connections are kept alive and reused
+    assert len(wiki.connections) <= 3
+
+
+class FakeCache:
+    def __init__(self, results: dict) -> None:
+        self.results = results
+        self.saved = {}
+
+    def get(self, wiki: str, path: str):
+        return self.results.get((wiki, path))
+
+    def set(self, wiki: str, path: str, exists: bool, redirect: bool):
+        self.saved[(wiki, path)] = (exists, redirect)
+
+def test_cached_pages_are_not_checked(wiki):
+    wiki.pages = {'Pinkie Pie'}
+    cache = FakeCache({('test', 'Applejack'): (True, False)})
+    pages = make_pages(wiki, ['Applejack', 'Pinkie_Pie'])
+
+    check(make_checker(wiki), pages, cache)
+
+    assert wiki.queries == [['Pinkie_Pie']]
+    assert pages[0]['result']['exists'] is True
+    assert cache.saved == {('test', 'Pinkie_Pie'): (True, False)}
+
+
+@pytest.mark.parametrize('pages', [
+    # formatversion 2
+    [{'title': 'A', 'pageid': 1}, {'title': 'B', 'missing': True}, {'title': '<', 'invalid': True}],
+    # formatversion 1
+    {'1': {'title': 'A', 'pageid': 1}, '-1': {'title': 'B', 'missing': ''}, '-2': {'title': '<', 'invalid': ''}},
+])
+def test_parse_query_response(pages):
+    response = {'query': {'pages': pages}}
+    assert parse_query_response(['A', 'B', '<'], response) == {
+        'A': (True, False),
+        'B': (False, False),
+        '<': (False, False),
+    }
+
+def test_parse_query_response_redirect_loop():
+    response = {'query': {
+        'redirects': [{'from': 'A', 'to': 'B'}, {'from': 'B', 'to': 'A'}],
+        'pages': [],
+    }}
+    assert parse_query_response(['A'], response) == {'A': (False, True)}
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+import sqlite3
+
+import pytest
+
+from wiki import WikiCache
+from wiki_stub import check, make_checker, make_pages
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.time = datetime(2024, 1, 1, 12)
+
+    def __call__(self) -> datetime:
+        return self.time
+
+    def advance(self, **kwargs):
+        self.time += timedelta(**kwargs)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'cache' / 'wiki-status.sqlite')
+
+@pytest.fixture
+def cache(cache_path, clock):
+    with WikiCache(
+        cache_path,
+        ttl_exists = timedelta(days = 30),
+        ttl_missing = timedelta(days = 1),
+        ttl_redirect = timedelta(days = 7),
+        now = clock,
+    ) as cache:
+        yield cache
+
+
+def test_unchecked_page(cache):
+    assert cache.get('indie', 'Twilight') is None
+
+@pytest.mark.parametrize('exists, redirect, ttl', [
+    (True, False, timedelta(days = 30)),
+    (False, False, timedelta(days = 1)),
+    (True, True, timedelta(days = 7)),
+])
+def test_ttl(cache, clock, exists, redirect, ttl):
+    cache.set('indie', 'Twilight', exists, redirect)
+
+    clock.advance(seconds = ttl.total_seconds() - 1)
+    assert cache.get('indie', 'Twilight') == (exists, redirect)
+
+    clock.advance(seconds = 1)
+    assert cache.get('indie', 'Twilight') is None
+
+def test_wikis_are_separate(cache):
+    cache.set('indie', 'Twilight', True, False)
+    cache.set('fandom', 'Twilight', False, False)
+
+    assert cache.get('indie', 'Twilight') == (True, False)
+    assert cache.get('fandom', 'Twilight') == (False, False)
+
+def test_set_replaces_and_restarts_ttl(cache, clock):
+    cache.set('indie', 'Twilight', False, False)
+    clock.advance(hours = 20)
+    cache.set('indie', 'Twilight', True, False)
+    clock.advance(days = 29)
+
+    assert cache.get('indie', 'Twilight') == (True, False)
+
+def test_results_are_saved(cache_path, clock):
+    with WikiCache(cache_path, now = clock) as cache:
+        cache.set('indie', 'Twilight', True, True)
+
+    connection = sqlite3.connect(cache_path)
+    rows = connection.execute('SELECT wiki, path, exists_, redirect, checked FROM pages').fetchall()
+    connection.close()
+    assert rows == [('indie', 'Twilight', 1, 1, clock().timestamp())]
+
+    with WikiCache(cache_path, now = clock) as cache:
+        assert cache.get('indie', 'Twilight') == (True, True)
+
+
+def test_checker_refetches_expired_pages(wiki, cache, clock):
+    wiki.pages = {'Applejack'}
+    checker = make_checker(wiki)
+
+    check(checker, make_pages(wiki, ['Applejack', 'Nopony']), cache)
+    assert len(wiki.queries) == 1
+
+    # both are still fresh
+    clock.advance(hours = 23)
+    check(checker, make_pages(wiki, ['Applejack', 'Nopony']), cache)
+    assert len(wiki.queries) == 1
+
+    # only the missing page has expired, and it exists now
+    clock.advance(hours = 1)
+    wiki.pages.add('Nopony')
+    pages = make_pages(wiki, ['Applejack', 'Nopony'])
+    check(checker, pages, cache)
+    assert wiki.queries[1:] == [['Nopony']]
+    assert pages[1]['result']['exists'] is True
+    assert cache.get('test', 'Nopony') == (True, False)
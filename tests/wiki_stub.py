@@ -0,0 +1,169 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import urllib.parse
+
+from wiki import WikiChecker, get_wiki_pages
+
+
+class StubWikiHandler(BaseHTTPRequestHandler):
+    # keep-alive, so the checker's sessions can reuse connections
+    protocol_version = 'HTTP/1.1'
+    server: 'StubWiki'
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status: int, data: dict | None = None):
+        body = b'' if data is None else json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_GET(self):
+        with self.server.track(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path != '/api.php' or not self.server.has_api:
+                self.respond(404)
+                return
+
+            titles = urllib.parse.parse_qs(url.query)['titles'][0].split('|')
+            with self.server.lock:
+                self.server.queries.append(titles)
+                status = self.server.api_statuses.pop(0) if self.server.api_statuses else 200
+            if status != 200:
+                self.respond(status)
+                return
+
+            self.respond(200, self.server.query(titles))
+
+    def do_HEAD(self):
+        with self.server.track(self):
+            title = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path.removeprefix('/wiki/'))
+            with self.server.lock:
+                self.server.heads.append(title)
+                status = self.server.head_status.get(title, 404)
+                if isinstance(status, list):
+                    status = status.pop(0) if len(status) > 1 else status[0]
+            self.respond(status)
+
+
+class StubWiki(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        """
+        A MediaWiki site on 127.0.0.1 that answers `action=query` on
+        `/api.php` like MediaWiki does (formatversion 2), and HEAD requests
+        on `/wiki/<title>` with `head_status` (a status, or a list of them to
+        go through in order).
+
+        `api_statuses` are the errors to answer queries with before answering
+        normally. Every request takes `delay` seconds, so concurrent requests
+        overlap.
+        """
+        super().__init__(('127.0.0.1', 0), StubWikiHandler)
+        self.pages: set[str] = set()
+        self.redirects: dict[str, str] = {}
+        self.has_api = True
+        self.api_statuses: list[int] = []
+        self.head_status: dict[str, int | list[int]] = {}
+        self.delay = 0.0
+
+        self.queries: list[list[str]] = []
+        self.heads: list[str] = []
+        self.connections: set[tuple[str, int]] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def api_url(self) -> str:
+        return self.url + '/api.php'
+
+    @property
+    def wiki_url(self) -> str:
+        return self.url + '/wiki/'
+
+    @contextmanager
+    def track(self, handler: StubWikiHandler):
+        with self.lock:
+            self.connections.add(handler.client_address)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def normalize(self, title: str) -> str:
+        return title.replace('_', ' ')
+
+    def query(self, titles: list[str]) -> dict:
+        normalized = []
+        redirects = []
+        pages = []
+        for title in titles:
+            target = self.normalize(title)
+            if target != title:
+                normalized.append({'from': title, 'to': target})
+            if target in self.redirects:
+                redirects.append({'from': target, 'to': self.redirects[target]})
+                target = self.redirects[target]
+            if target in self.pages:
+                pages.append({'pageid': len(pages) + 1, 'ns': 0, 'title': target})
+            else:
+                pages.append({'ns': 0, 'title': target, 'missing': True})
+
+        query = {'pages': pages}
+        if normalized:
+            query['normalized'] = normalized
+        if redirects:
+            query['redirects'] = redirects
+        return {'batchcomplete': True, 'query': query}
+
+
+@contextmanager
+def run_stub_wiki():
+    wiki = StubWiki()
+    thread = threading.Thread(target = wiki.serve_forever, args = (0.01,), daemon = True)
+    thread.start()
+    try:
+        yield wiki
+    finally:
+        wiki.shutdown()
+        wiki.server_close()
+        thread.join()
+
+
+def make_checker(wiki: StubWiki, **kwargs) -> WikiChecker:
+    # no backoff, so retries don't slow the tests down
+    kwargs.setdefault('backoff', 0)
+    kwargs.setdefault('timeout', 5)
+    return WikiChecker(api_urls = {'test': wiki.api_url}, **kwargs)
+
+def make_pages(wiki: StubWiki, names: list[str], name: str = 'test') -> list[dict]:
+    pages = []
+    for pony_name in names:
+        _, name_pages = get_wiki_pages(pony_name, {}, {name: wiki.wiki_url}, {name: {'page': '{name}'}})
+        pages.extend(name_pages)
+    return pages
+
+def check(checker: WikiChecker, pages: list[dict], cache = None) -> list[tuple[dict, Exception | None]]:
+    with checker:
+        return list(checker.check(pages, cache))
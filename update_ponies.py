@@ -1,19 +1,32 @@
 import argparse
+import codecs
+import cProfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
 from glob import glob
+import hashlib
 import io
 import json
 import os
 import pathlib
 import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
 from types import EllipsisType
-from typing import Any
-from typing import Iterable, Optional, Sequence, Union
+from typing import IO, Any
+from typing import Callable, Iterable, Optional, Sequence, Union
 import urllib.parse
-from datetime import datetime, timedelta
+from xml.etree.ElementTree import ParseError
+
+try:
+    import resource
+except ImportError:
+    # windows
+    resource = None
 
 import charset_normalizer
-import requests
-import requests
 from rich.progress import (
     BarColumn,
     MofNCompleteColumn,
@@ -26,7 +39,13 @@ from rich.console import Console
 console = Console()
 
 from PIL import Image
-from crop import crop_image
+from atlas import build_atlas
+from crop import crop_image, get_crop_box
+from game_files import filter_categories, normalize_game_path, open_game_files
+from snapshot import GameDataSnapshot, SnapshotCache
+from png_optimizer import optimize_png
+from output import brotli, dump_json, intern_strings, write_compressed, write_if_changed, write_shards
+from wiki import WIKI_API_URLS, WikiCache, WikiChecker, check_wiki, get_wiki_pages
 
 from luna_kit.gameobjectdata import GameObject, GameObjectData
 from luna_kit.loc import LOC
@@ -35,6 +54,21 @@ from luna_kit.pvr import PVR
 import luna_kit.typings
 from luna_kit.typings.defaultGameCampaign import DefaultGameCampaignType
 
+# the files the snapshot is made from, along with the loc files
+SNAPSHOT_FILES = [
+    'gameobjectdata.xml',
+    'shopdata.xml',
+    'gameobjectcategorydata.xml',
+    'defaultGameCampaign.json',
+]
+
+# the gameobjectdata categories we use, these are the only ones that get
+# streamed or go in the snapshot
+GAMEOBJECT_CATEGORIES = [
+    'Pony',
+    'HiddenPony',
+]
+
 NPC_PONIES = [
     "Pony_Derpy", # derpy box, not playable muffins
     'Pony_Disguised_Spike',
@@ -65,22 +99,6 @@ UNUSED_PONIES = [
     'Pony_Token_Test',
 ]
 
-WIKI_URLS = {
-    'indie': 'https://mlp-game-wiki.no/index.php/',
-    'fandom': 'https://mlp-gameloft.fandom.com/wiki/',
-}
-
-WIKI_PAGES = {
-    'indie': {
-        'page': '{name}',
-        '2d_image': 'File:{name}_2d.png',
-        'portrait': 'File:{name}_portrait.png',
-    },
-    'fandom': {
-        'page': '{name}',
-    }
-}
-
 LOCATIONS = {
     0: 'PONYVILLE',
     1: 'CANTERLOT',
@@ -139,48 +157,10 @@ def track(
     with progress:
         yield from progress.track(
             sequence = sequence,
+            total = total,
             description = description,
         )
 
-def check_wiki(name: str, result: Optional[dict] = None, check: bool = False):
-    if not isinstance(result, dict):
-        result = {}
-    
-    
-    for wiki, wiki_url in WIKI_URLS.items():
-        if not wiki_url.endswith('/') and not wiki_url.endswith('\\'):
-            wiki_url += '/'
-        
-        wiki_result = result.setdefault(wiki, {})
-        for page, url_template in WIKI_PAGES[wiki].items():
-            page_result: dict = wiki_result.setdefault(page, {
-                'exists': False,
-                'redirect': False,
-                'path': url_template.format(name = name),
-            })
-            if check and (not page_result.get('exists', False) or page_result.get('redirect', False)):
-                page_result['path'] = url_template.format(name = name)
-                url = wiki_url + page_result.get('path', url_template.format(name = name))
-
-                if (datetime.now() - datetime.fromtimestamp(page_result.get('timestamp', 0))) < timedelta(days = 1):
-                    console.print(f'skipping {url}')
-                    continue
-                    
-                response = requests.head(url)
-                if response.status_code == 301:
-                    page_result['exists'] = True
-                    page_result['redirect'] = True
-                elif response.status_code == 200:
-                    page_result['exists'] = True
-                    page_result['redirect'] = False
-                else:
-                    page_result['exists'] = False
-                    page_result['redirect'] = False
-                    page_result['timestamp'] = datetime.now().timestamp()
-                    console.print(f'[red]no page for [blue]{url}[/]')
-        
-    return result
-
 def add_translation(key: str, pony_info: dict, loc_files: list[LOC], type: str = 'name', locked: bool = False):
     unknown_name = False
     for loc in loc_files:
@@ -218,8 +198,582 @@ def translate(
     return translation
 
 
-def get_encoding(file_path: str):
-    return charset_normalizer.from_path(file_path).best().encoding
+def clean_string(string: str) -> str:
+    return string.strip().replace('|', '')
+
+class TranslationIndex:
+    def __init__(self, loc_files: list[LOC], keys: Iterable[str]) -> None:
+        """
+        All the translations for the given keys, already cleaned, so getting a
+        translation is a single dict lookup instead of going through every loc
+        file each time.
+
+        Strings are interned and keys with the exact same translations share
+        the same dict, since a lot of ponies have the same name in most
+        languages, and clones often have the same description.
+        """
+        self.loc_files = loc_files
+        self.languages = [loc['DEV_ID'].lower() for loc in loc_files]
+        # gets the loc files again after unpickling, for keys that aren't
+        # in the snapshot
+        self.load_loc_files: Callable[[], list[LOC]] | None = None
+        self.strings: dict[str, dict[str, str]] = {}
+        # key: languages it's missing from
+        self.missing: dict[str, list[str]] = {}
+
+        self._shared: dict[tuple[str, ...], dict[str, str]] = {}
+
+        for key in keys:
+            self.add(key)
+
+    def __getstate__(self) -> dict:
+        # the loc files stay out of the snapshot, so only the keys that were
+        # already added can be used after unpickling (unless
+        # `load_loc_files` is set)
+        state = self.__dict__.copy()
+        state['loc_files'] = None
+        state['load_loc_files'] = None
+        state['_shared'] = {}
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict):
+        """
+        The snapshot only has the state, since this class is in `__main__`
+        when this file is run as a script, and it couldn't be unpickled when
+        imported.
+        """
+        index = cls.__new__(cls)
+        index.__setstate__(state)
+        return index
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+
+    def add(self, key: str) -> dict[str, str]:
+        if key in self.strings:
+            return self.strings[key]
+        
+        if self.loc_files is None:
+            if self.load_loc_files is None:
+                raise KeyError(f'{key} is not in the snapshot, run with --no-snapshot')
+            
+            loc_files = self.load_loc_files()
+            if [loc['DEV_ID'].lower() for loc in loc_files] != self.languages:
+                raise KeyError(f'{key} is not in the snapshot, and the loc files have different languages')
+            self.loc_files = loc_files
+        
+        strings = []
+        for lang, loc in zip(self.languages, self.loc_files):
+            if key not in loc:
+                self.missing.setdefault(key, []).append(lang)
+            strings.append(sys.intern(clean_string(loc.translate(key))))
+        
+        strings = tuple(strings)
+        if strings not in self._shared:
+            self._shared[strings] = dict(zip(self.languages, strings))
+        
+        self.strings[key] = self._shared[strings]
+        return self.strings[key]
+
+    def translate(
+        self,
+        key: str,
+        translation: dict[str, str] | None = None,
+        locked: bool = False,
+    ) -> dict[str, str]:
+        """
+        Same as `translate()`, but using the index. Keys that weren't indexed
+        get added.
+        """
+        if translation is None:
+            translation = {}
+        
+        strings = self.strings.get(key)
+        if strings is None:
+            strings = self.add(key)
+        
+        if locked:
+            for lang, string in strings.items():
+                translation[lang] = clean_string(translation[lang]) if lang in translation else string
+        else:
+            translation.update(strings)
+        
+        return translation
+
+    def print_missing(self):
+        for key, languages in self.missing.items():
+            if len(languages) == len(self.languages):
+                console.print(f'[yellow]no translation for [blue]{key}[/]')
+            else:
+                console.print(f'[yellow]no {", ".join(languages)} translation for [blue]{key}[/]')
+
+
+IMAGE_EXTENSIONS = ['.png', '.pvr']
+
+def load_image(source: str, data: dict[str, bytes] | None = None) -> Image.Image:
+    """
+    `data` has the contents of the source files (from `image_source_files()`)
+    when they aren't on disk, like textures read from .ark archives.
+    """
+    if data is None:
+        if os.path.splitext(source)[1].lower() == '.pvr':
+            return PVR(source, external_alpha = True).image
+        
+        return Image.open(source)
+    
+    if os.path.splitext(source)[1].lower() == '.pvr':
+        # the PVR decoder finds the alpha texture by its file name, so these
+        # only get written to a temporary folder for as long as it takes to
+        # decode them
+        with tempfile.TemporaryDirectory() as folder:
+            for path, file_data in data.items():
+                with open(os.path.join(folder, os.path.basename(path)), 'wb') as file:
+                    file.write(file_data)
+            image = PVR(os.path.join(folder, os.path.basename(source)), external_alpha = True).image
+            image.load()
+        return image
+    
+    return Image.open(io.BytesIO(data[source]))
+
+def image_source_files(source: str, exists = os.path.exists) -> list[str]:
+    """
+    PVR textures can have their alpha in a separate `_alpha` texture, so that
+    has to be part of the source too.
+    """
+    files = [source]
+    name, extension = os.path.splitext(source)
+    if extension.lower() == '.pvr' and exists(alpha := f'{name}_alpha{extension}'):
+        files.append(alpha)
+    
+    return files
+
+def get_source_stat(source: str) -> tuple[int, float]:
+    stats = [os.stat(path) for path in image_source_files(source)]
+    return sum(stat.st_size for stat in stats), max(stat.st_mtime for stat in stats)
+
+def hash_files(paths: Iterable[str]) -> str:
+    hash = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as file:
+            while chunk := file.read(1024 * 1024):
+                hash.update(chunk)
+    
+    return hash.hexdigest()
+
+def hash_data(chunks: Iterable[bytes]) -> str:
+    """
+    The same as `hash_files()`, for files that have already been read.
+    """
+    hash = hashlib.sha256()
+    for chunk in chunks:
+        hash.update(chunk)
+    
+    return hash.hexdigest()
+
+def get_plain_data(data: Any) -> Any:
+    """
+    Copy dicts (like game objects and their components) and lists into plain
+    ones, so they hash the same no matter what class they came from.
+    """
+    if isinstance(data, dict):
+        return {str(key): get_plain_data(value) for key, value in sorted(data.items(), key = lambda item: str(item[0]))}
+    if isinstance(data, (list, tuple)):
+        return [get_plain_data(value) for value in data]
+    
+    return data
+
+def hash_json(data: Any) -> str:
+    return hashlib.sha256(json.dumps(
+        data,
+        sort_keys = True,
+        ensure_ascii = False,
+        default = str,
+    ).encode('utf-8')).hexdigest()
+
+def get_cpu_time() -> float:
+    """
+    CPU time of this process, plus child processes that have finished (like
+    the pool workers once the pool has been shut down).
+    """
+    cpu = time.process_time()
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += usage.ru_utime + usage.ru_stime
+    return cpu
+
+def add_timing(
+    timings: dict[str, dict],
+    name: str,
+    wall: float,
+    cpu: float | None = None,
+    count: int | None = None,
+):
+    """
+    Add to the wall time, CPU time and item count of a stage.
+    """
+    timing = timings.setdefault(name, {
+        'wall': 0.0,
+        'cpu': None,
+        'count': None,
+    })
+    timing['wall'] += wall
+    if cpu is not None:
+        timing['cpu'] = (timing['cpu'] or 0.0) + cpu
+    if count is not None:
+        timing['count'] = (timing['count'] or 0) + count
+
+@contextmanager
+def measure(timings: dict[str, dict], name: str):
+    start = time.perf_counter()
+    cpu_start = get_cpu_time()
+    try:
+        yield
+    finally:
+        add_timing(timings, name, time.perf_counter() - start, get_cpu_time() - cpu_start, 1)
+
+# how each image variant format gets saved
+IMAGE_FORMATS = {
+    'png': {
+        'format': 'png',
+        'extension': '.png',
+        'options': {'optimize': True},
+    },
+    'webp': {
+        'format': 'webp',
+        'extension': '.webp',
+        'options': {'quality': 90, 'method': 4},
+    },
+    'avif': {
+        'format': 'avif',
+        'extension': '.avif',
+        'options': {'quality': 80},
+    },
+}
+
+def is_image_format_supported(format: str) -> bool:
+    Image.init()
+    return IMAGE_FORMATS[format]['format'].upper() in Image.SAVE
+
+def get_image_variants(sizes: list[int] | None, formats: list[str] | None) -> list[list]:
+    """
+    Get the `[size, format]` of every variant to save next to each image.
+    `None` is the full size. Formats default to webp if only sizes are
+    given (`None`, not an empty list), and the full size png is left out
+    since that's the main image.
+    """
+    if not sizes and not formats:
+        return []
+    
+    if formats is None:
+        formats = ['webp']
+    
+    variants = []
+    for size in [None, *sorted(set(sizes or []))]:
+        for format in formats:
+            if size is None and format == 'png':
+                continue
+            variants.append([size, format])
+    
+    return variants
+
+def get_variant_path(output: str, size: int | None, format: str) -> str:
+    name = os.path.splitext(output)[0]
+    if size is not None:
+        name += f'@{size}'
+    return name + IMAGE_FORMATS[format]['extension']
+
+def save_variants(
+    image: Image.Image,
+    output: str,
+    variants: list[list],
+    encoded: dict | None = None,
+    keep_existing: bool = False,
+) -> list[dict]:
+    """
+    Save the smaller sizes and other formats of an image next to it. Sizes
+    are the max width and height, and sizes the image already fits in are
+    skipped.
+
+    `encoded` keeps each variant's bytes by size and format, so other images
+    from the same texture don't have to encode them again. With
+    `keep_existing`, variants that are already saved aren't encoded or
+    written at all (for the image store, where the name comes from the
+    image's hash).
+
+    Returns:
+        list[dict]: The path, format, dimensions and byte size of each variant.
+    """
+    if encoded is None:
+        encoded = {}
+    
+    result = []
+    for size, format in variants:
+        if size is not None and max(image.size) <= size:
+            continue
+        
+        path = get_variant_path(output, size, format)
+        if keep_existing and (size, format) not in encoded and os.path.exists(path):
+            # only the header gets read
+            with Image.open(path) as existing:
+                width, height = existing.size
+            result.append({
+                'path': '/' + normalize_path(path),
+                'format': format,
+                'max_size': size,
+                'width': width,
+                'height': height,
+                'bytes': os.path.getsize(path),
+            })
+            continue
+        
+        if (size, format) not in encoded:
+            variant = image
+            if size is not None:
+                variant = image.copy()
+                variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+            
+            buffer = io.BytesIO()
+            variant.save(buffer, IMAGE_FORMATS[format]['format'], **IMAGE_FORMATS[format]['options'])
+            encoded[(size, format)] = (buffer.getvalue(), variant.width, variant.height)
+        
+        data, width, height = encoded[(size, format)]
+        if not (keep_existing and os.path.exists(path)):
+            write_if_changed(path, data)
+        result.append({
+            'path': '/' + normalize_path(path),
+            'format': format,
+            'max_size': size,
+            'width': width,
+            'height': height,
+            'bytes': len(data),
+        })
+    
+    return result
+
+def has_variants(entry: dict, job: dict) -> bool:
+    """
+    Check if an image manifest entry has all the variants a job needs.
+    """
+    return entry.get('variant_settings', []) == job.get('variant_settings', []) and all(
+        os.path.exists(variant['path'][1:]) for variant in entry.get('variants', [])
+    )
+
+def get_store_path(store: str, output_hash: str) -> str:
+    """
+    Get where an image goes in the content addressed image store.
+    """
+    return normalize_path(os.path.join(store, f'{output_hash[:16]}.png'))
+
+def extract_image(job: dict, textures: dict | None = None) -> dict:
+    """
+    This runs in the image stage worker processes, so errors get returned in
+    the result instead of raised. That way one bad texture doesn't stop the
+    rest of the images.
+
+    If the source hash matches `job['source_hash']` the image doesn't get
+    decoded at all, and the output is only written if the bytes changed.
+    Otherwise, the variants in `job['variant_settings']` get saved too.
+
+    If the source files aren't on disk, their contents are in `job['data']`.
+
+    If `job['store']` is set, the image is saved in that folder named by its
+    hash instead of at `job['output']`, so identical images are only saved
+    once. Where it actually went is in `result['path']`.
+
+    How long each step took is in `result['timings']`.
+
+    Decoded textures are kept in `textures` (if given) by source path, size
+    and mtime, so jobs with the same source only decode, crop and encode it
+    (and its variants) once.
+    `result['texture']` is `decoded` or `reused` if the image was needed.
+
+    If `job['optimize']` is set, the image is saved with the smallest lossless
+    PNG encoding, and `result['optimize_saved']` is how many bytes that saved.
+    """
+    result = dict(job)
+    # no need to send the source back
+    result.pop('data', None)
+    result['error'] = None
+    result['status'] = 'unchanged'
+    result['timings'] = timings = {}
+    try:
+        if textures is None:
+            textures = {}
+        texture_key = (os.path.realpath(job['source']), job['size'], job['mtime'])
+        texture = textures.get(texture_key)
+
+        if texture is None:
+            with measure(timings, 'hash'):
+                if job.get('data') is not None:
+                    result['source_hash'] = hash_data(job['data'].values())
+                else:
+                    result['source_hash'] = hash_files(image_source_files(job['source']))
+        else:
+            result['source_hash'] = texture['source_hash']
+        result['path'] = job.get('path', job['output'])
+        if result['source_hash'] == job.get('source_hash') and os.path.exists(result['path']):
+            return result
+
+        if texture is None:
+            result['texture'] = 'decoded'
+            with measure(timings, 'decode'):
+                image = load_image(job['source'], job.get('data'))
+                if image.mode != 'RGBA':
+                    image = image.convert('RGBA')
+            
+            with measure(timings, 'crop'):
+                crop_box = get_crop_box(image)
+                if crop_box is not None:
+                    image = image.crop(crop_box)
+
+            with measure(timings, 'encode'):
+                buffer = io.BytesIO()
+                image.save(buffer, 'png')
+                data = buffer.getvalue()
+            
+            optimize_saved = 0
+            if job.get('optimize'):
+                with measure(timings, 'optimize'):
+                    optimized = optimize_png(image)
+                if len(optimized) < len(data):
+                    optimize_saved = len(data) - len(optimized)
+                    data = optimized
+            
+            texture = {
+                'source_hash': result['source_hash'],
+                'image': image,
+                'crop': list(crop_box) if crop_box is not None else None,
+                'data': data,
+                'output_hash': hashlib.sha256(data).hexdigest(),
+                'optimized': bool(job.get('optimize')),
+                'optimize_saved': optimize_saved,
+                # encoded variants, by size and format
+                'variants': {},
+            }
+            textures[texture_key] = texture
+        else:
+            result['texture'] = 'reused'
+        
+        image = texture['image']
+        data = texture['data']
+        result['crop'] = texture['crop']
+        result['output_hash'] = texture['output_hash']
+        result['output_size'] = len(data)
+        result['optimized'] = texture['optimized']
+        result['optimize_saved'] = texture['optimize_saved']
+
+        if job.get('store') is None:
+            result['path'] = job['output']
+        else:
+            result['path'] = get_store_path(job['store'], result['output_hash'])
+        
+        if not os.path.exists(result['path']) or hash_files([result['path']]) != result['output_hash']:
+            # other workers can be saving the same image to the store
+            temp_path = f'{result["path"]}.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, result['path'])
+            result['status'] = 'updated'
+        
+        with measure(timings, 'variants'):
+            result['variants'] = save_variants(
+                image,
+                result['path'],
+                job.get('variant_settings', []),
+                texture['variants'],
+                job.get('store') is not None,
+            )
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    
+    return result
+
+def extract_image_group(jobs: list[dict]) -> list[dict]:
+    """
+    Extract images that all have the same source, so only the first one has
+    to decode it. The texture is let go once the group is done, so workers
+    only hold on to one at a time.
+    """
+    textures = {}
+    return [extract_image(job, textures) for job in jobs]
+
+
+def load_loc(filename: str) -> LOC:
+    return LOC(filename)
+
+def get_loc_language(filename: str) -> str:
+    return normalize_language(os.path.splitext(os.path.basename(filename))[0])
+
+def normalize_language(language: str) -> str:
+    return language.lower().replace('_', ' ').replace('-', ' ')
+
+
+# utf-32 has to come before utf-16, because the utf-32-le bom starts with the
+# utf-16-le bom
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# how much of a file charset_normalizer gets to look at
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+def detect_encoding(file_path: str) -> str:
+    """
+    Pretty much every file is utf-8, so check for a bom and then try utf-8
+    (streamed, so it doesn't need the whole file in memory) before asking
+    charset_normalizer, which only gets a sample of the start of the file.
+    """
+    with open(file_path, 'rb') as file:
+        start = file.read(4)
+        for bom, encoding in BOMS:
+            if start.startswith(bom):
+                return encoding
+        
+        file.seek(0)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            while chunk := file.read(1024 * 1024):
+                decoder.decode(chunk)
+            decoder.decode(b'', final = True)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+
+        file.seek(0)
+        sample = file.read(ENCODING_SAMPLE_SIZE)
+    
+    match = charset_normalizer.from_bytes(sample).best()
+    if match is None:
+        return 'utf-8'
+    return match.encoding
+
+def get_encoding(file_path: str, cache: dict[str, dict] | None = None) -> str:
+    """
+    Get the encoding of a file. If a `cache` dict is passed, the result is
+    saved in it by path, size and mtime, so it doesn't have to be detected
+    again until the file changes.
+    """
+    if cache is None:
+        return detect_encoding(file_path)
+    
+    stat = os.stat(file_path)
+    key = normalize_path(os.path.abspath(file_path))
+    entry = cache.get(key)
+    if entry is not None and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+        return entry['encoding']
+    
+    encoding = detect_encoding(file_path)
+    cache[key] = {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'encoding': encoding,
+    }
+    return encoding
 
 
 class GetGameData:
@@ -230,47 +784,154 @@ class GetGameData:
         output_folder: str,
         no_images: bool = False,
         check_wiki: bool = False,
+        jobs: int | None = None,
+        cache_folder: str = '.cache',
+        force_images: bool = False,
+        wiki_api: bool = True,
+        wiki_ttl: dict[str, float] | None = None,
+        languages: list[str] | None = None,
+        encodings: dict[str, str] | None = None,
+        sharded: bool = False,
+        minified: bool = False,
+        interned: bool = False,
+        incremental: bool = True,
+        use_snapshot: bool = True,
+        stream_categories: bool = False,
+        image_sizes: list[int] | None = None,
+        image_formats: list[str] | None = None,
+        portrait_atlas: int | None = None,
+        content_addressed: bool = False,
+        optimize_png: str | None = None,
+        profile: str | None = None,
+        profile_stage: str | None = None,
     ) -> None:
         self.no_images = no_images
         self.check_wiki = check_wiki
+        self.jobs = jobs
+        self.cache_folder = cache_folder
+        self.force_images = force_images
+        self.wiki_api = wiki_api
+        self.languages = languages
+        # days to keep `exists`, `missing` and `redirect` wiki results for
+        self.wiki_ttl = {
+            'exists': 30,
+            'missing': 1,
+            'redirect': 7,
+            **(wiki_ttl or {}),
+        }
+        self.sharded = sharded
+        self.minified = minified
+        self.interned = interned
+        self.incremental = incremental
+        self.use_snapshot = use_snapshot
+        self.stream_categories = stream_categories
+        supported_formats = None
+        if image_formats:
+            supported_formats = []
+            for format in image_formats:
+                if is_image_format_supported(format):
+                    supported_formats.append(format)
+                else:
+                    console.print(f'[yellow]this version of Pillow can\'t save {format}, skipping {format} images')
+            if not supported_formats:
+                raise ValueError(f'this version of Pillow can\'t save any of the image formats: {", ".join(image_formats)}')
+        # thumbnail size for the portrait atlas
+        self.portrait_atlas = portrait_atlas
+        # `all` images or only `changed` ones get the smallest lossless png
+        self.optimize_png = optimize_png
+        # [size, format] of the extra versions of each image to save
+        self.image_variants = get_image_variants(
+            image_sizes,
+            supported_formats,
+        )
+        # where to save the timings, and the stage to run under cProfile
+        self.profile = profile
+        self.profile_stage = profile_stage
+        # file: encoding, for files that shouldn't go through detection
+        self.encodings = {
+            normalize_path(path): encoding for path, encoding in (encodings or {}).items()
+        }
         self.version = version
         self.game_folder = game_folder
         self.output_folder = output_folder
+        self.game_files = open_game_files(self.game_folder, self.cache_folder)
 
         self.output_game_data = os.path.join(self.output_folder, 'json', 'game-data.json')
+        self.output_minified_game_data = os.path.join(self.output_folder, 'json', 'game-data.min.json')
+        self.output_interned_game_data = os.path.join(self.output_folder, 'json', 'game-data.interned.json')
+        self.output_shards = os.path.join(self.output_folder, 'json', 'game-data')
         self.images_folder = os.path.join(self.output_folder, 'images')
+        # folder to save the images in by hash, if they're content addressed
+        self.image_store = normalize_path(os.path.relpath(os.path.join(self.images_folder, 'store'))) if content_addressed else None
+        self.image_manifest_path = os.path.join(self.cache_folder, 'image-manifest.json')
+        self.wiki_cache_path = os.path.join(self.cache_folder, 'wiki-status.sqlite')
+        self.encoding_cache_path = os.path.join(self.cache_folder, 'encodings.json')
+        self.fingerprints_path = os.path.join(self.cache_folder, 'pony-fingerprints.json')
+        self.changelog_folder = os.path.join(self.output_folder, 'json')
 
         self.game_data = {}
-
-        self.get_content_version()
-
-        console.print('loading gameobjectdata.xml')
-        self.gameobjectdata = GameObjectData(
-            self.get_game_file('gameobjectdata.xml', 'rb'),
-            self.get_game_file('shopdata.xml', 'rb'),
-            self.get_game_file('gameobjectcategorydata.xml', 'rb'),
-        )
-
+        self.image_jobs: list[dict] = []
+        # loaded by `get_image_path()` when it's first needed
+        self.image_manifest: dict[str, dict] | None = None
+        self.wiki_pages: list[dict] = []
+
+        # stage: wall and CPU time in seconds, and how many items it did
+        self.timings: dict[str, dict] = {}
+        self._printed_timings: set[str] = set()
+        startup_start = time.perf_counter()
+        startup_cpu_start = get_cpu_time()
+
+        self.encoding_cache: dict[str, dict] = {}
+        if os.path.exists(self.encoding_cache_path):
+            with open(self.encoding_cache_path, 'r', encoding = 'utf-8') as file:
+                self.encoding_cache = json.load(file)
+
+        with self.timed('data_ver.xml'):
+            self.get_content_version()
+
+        loc_filenames = self.loc_filenames = self.get_loc_filenames()
+        self._loc_files: list[LOC] | None = None
+
+        snapshot_cache = SnapshotCache(self.cache_folder)
+        snapshot = None
+        if self.use_snapshot:
+            with self.timed('snapshot'):
+                snapshot_key = self.get_snapshot_key(snapshot_cache, SNAPSHOT_FILES + loc_filenames)
+                snapshot = snapshot_cache.load(snapshot_key)
         
-        console.print('Loading loc files')
-        self.loc_files: list[LOC] = [
-            LOC(filename) for filename in glob(os.path.join(game_folder, '*.loc'))
-        ]
-
-        self.defaultGameCampaign: DefaultGameCampaignType = json.load(self.get_game_file('defaultGameCampaign.json'))
-        self.daily_goals_shop = {
-            item['item_id']: item['cost']
-            for item in self.defaultGameCampaign.get('mini_games', {}).get('dailygoals', {}).get('itemshop', [])
-        }
-
-        if len(self.loc_files) == 0:
-            raise ValueError('Could not find loc files')
+        if snapshot is not None:
+            console.print('using the parsed game data snapshot')
+            self.gameobjectdata: GameDataSnapshot = snapshot['gameobjectdata']
+            self.daily_goals_shop: dict[str, int] = snapshot['daily_goals_shop']
+            self.translations = TranslationIndex.from_state(snapshot['translations'])
+            self.translations.load_loc_files = lambda: self.loc_files
+        else:
+            self.parse_game_files(loc_filenames)
+
+            if self.use_snapshot:
+                with self.timed('save snapshot'):
+                    snapshot_cache.save(snapshot_key, {
+                        'gameobjectdata': GameDataSnapshot.from_gameobjectdata(
+                            self.gameobjectdata,
+                            GAMEOBJECT_CATEGORIES,
+                        ),
+                        'daily_goals_shop': self.daily_goals_shop,
+                        'translations': self.translations.__getstate__(),
+                    })
+        
+        add_timing(
+            self.timings,
+            'startup',
+            time.perf_counter() - startup_start,
+            get_cpu_time() - startup_cpu_start,
+        )
+        self.print_timings()
 
         self.migrate = False
         with open(
             self.output_game_data,
             'r',
-            encoding = get_encoding(self.output_game_data),
+            encoding = self.get_encoding(self.output_game_data),
         ) as file:
             self.game_data = json.load(file)
         
@@ -298,50 +959,936 @@ class GetGameData:
 
         self.categories = self.game_data.setdefault('categories', {})
 
-        self.get_ponies()
+        self.old_fingerprints = self.load_fingerprints()
+        # so changes to the script get picked up
+        self.code_hash = hash_files([__file__])
+        # pony: fingerprint, texture hashes and group from this run
+        self.fingerprints: dict[str, dict] = {}
+
+        with self.timed('ponies', len(self.gameobjectdata['Pony'])):
+            self.get_ponies()
+        with self.timed('images', len(self.image_jobs)):
+            self.extract_images()
+        if self.image_store is not None and not self.no_images:
+            with self.timed('image store'):
+                self.clean_image_store()
+        if self.portrait_atlas is not None and not self.no_images:
+            with self.timed('portrait atlas') as stage:
+                stage['count'] = self.build_portrait_atlas()
+        if self.check_wiki:
+            with self.timed('wiki', len(self.wiki_pages)):
+                self.check_wiki_status()
 
         console.print('saving game data')
-        with open(self.output_game_data, 'w', encoding = 'utf-8') as file:
-            json.dump(self.game_data, file, indent = 2, ensure_ascii = False)
+        with self.timed('save game data'):
+            with open(self.output_game_data, 'w', encoding = 'utf-8') as file:
+                json.dump(self.game_data, file, indent = 2, ensure_ascii = False)
+        
+        if self.minified:
+            with self.timed('save minified'):
+                self.save_minified()
+
+        if self.interned:
+            with self.timed('save interned'):
+                self.save_interned()
+
+        if self.sharded:
+            with self.timed('save shards'):
+                self.save_shards()
+
+        self.save_changelog()
+        self.save_fingerprints()
+
+        # we know what we just wrote, so the next run doesn't have to detect it
+        stat = os.stat(self.output_game_data)
+        self.encoding_cache[normalize_path(os.path.abspath(self.output_game_data))] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'encoding': 'utf-8',
+        }
+
+        os.makedirs(self.cache_folder, exist_ok = True)
+        with open(self.encoding_cache_path, 'w', encoding = 'utf-8') as file:
+            json.dump(self.encoding_cache, file, indent = 2)
+        
+        self.print_timings()
+        if self.profile is not None:
+            self.save_profile()
         
     
+    def save_minified(self):
+        """
+        Save the minified game data for the site next to the readable one, with
+        precompressed .gz and .br versions so static hosting can serve them
+        directly.
+        """
+        console.print('saving minified game data')
+        sizes = {
+            self.output_game_data: os.path.getsize(self.output_game_data),
+            **write_compressed(self.output_minified_game_data, dump_json(self.game_data)),
+        }
+
+        for path, size in sizes.items():
+            console.print(f'{os.path.basename(path)}: {size:,} bytes')
+        
+        if brotli is None:
+            console.print('[yellow]install brotli to also save .br files')
+
+    def save_interned(self):
+        console.print('saving game data with a string table')
+        interned_game_data = intern_strings(self.game_data)
+        data = dump_json(interned_game_data)
+        if self.minified:
+            sizes = write_compressed(self.output_interned_game_data, data)
+        else:
+            write_if_changed(self.output_interned_game_data, data)
+            sizes = {self.output_interned_game_data: len(data)}
+        
+        console.print(f'{len(interned_game_data["string_table"]["strings"]):,} unique strings')
+        for path, size in sizes.items():
+            console.print(f'{os.path.basename(path)}: {size:,} bytes')
+
+    def save_shards(self):
+        console.print('saving game data shards')
+        manifest = write_shards(self.game_data, self.output_shards, self.minified)
+
+        full_size = os.path.getsize(self.output_game_data)
+        for language, shard in manifest['strings'].items():
+            size = manifest['index']['size'] + shard['size']
+            console.print(f'{language}: {size} bytes for the index and strings ({size / full_size:.1%} of game-data.json)')
+
+    def load_fingerprints(self) -> dict:
+        fingerprints = {}
+        if os.path.exists(self.fingerprints_path):
+            with open(self.fingerprints_path, 'r', encoding = 'utf-8') as file:
+                fingerprints = json.load(file)
+            if fingerprints.get('version') != 1:
+                fingerprints = {}
+        
+        fingerprints.setdefault('ponies', {})
+        return fingerprints
+
+    def save_fingerprints(self):
+        os.makedirs(self.cache_folder, exist_ok = True)
+        with open(self.fingerprints_path, 'w', encoding = 'utf-8') as file:
+            json.dump({
+                'version': 1,
+                'game_version': self.version,
+                'content_version': self.content_version,
+                'changelog_from': self.get_changelog_from(),
+                'ponies': self.fingerprints,
+            }, file, indent = 2, ensure_ascii = False)
+
+    def get_changelog_from(self) -> dict | None:
+        """
+        Get the version the changelog starts from. Re-running on the same
+        content version keeps adding to the same changelog.
+        """
+        if 'content_version' not in self.old_fingerprints:
+            return None
+        
+        if self.old_fingerprints['content_version'] == self.content_version:
+            return self.old_fingerprints.get('changelog_from')
+        
+        return {
+            'game_version': self.old_fingerprints.get('game_version'),
+            'content_version': self.old_fingerprints['content_version'],
+        }
+
+    def get_changelog(self) -> dict:
+        """
+        Compare this run's pony fingerprints to the last run's.
+
+        `modified` has the parts of each pony that changed (`data`, `shop`,
+        `strings` and `images`). Changes to this script or its options make
+        ponies get reprocessed, but don't count as modified.
+        """
+        old = self.old_fingerprints['ponies']
+        new = self.fingerprints
+
+        modified = {}
+        for pony_id in new.keys() & old.keys():
+            old_fingerprint = old[pony_id]['fingerprint']
+            new_fingerprint = new[pony_id]['fingerprint']
+
+            parts = [
+                part for part in ['data', 'shop']
+                if old_fingerprint.get(part) != new_fingerprint.get(part)
+            ]
+            # only compare languages that were loaded both times, and
+            # textures that were hashed both times
+            for part in ['strings', 'images']:
+                old_hashes = old_fingerprint.get(part, {})
+                new_hashes = new_fingerprint.get(part, {})
+                if any(old_hashes[key] != new_hashes[key] for key in old_hashes.keys() & new_hashes.keys()):
+                    parts.append(part)
+            
+            if parts:
+                modified[pony_id] = sorted(parts)
+
+        return {
+            'from': self.get_changelog_from(),
+            'to': {
+                'game_version': self.version,
+                'content_version': self.content_version,
+            },
+            'added': sorted(new.keys() - old.keys()),
+            'removed': sorted(old.keys() - new.keys()),
+            'modified': dict(sorted(modified.items())),
+        }
+
+    def save_changelog(self):
+        """
+        Save the changes since the last content version to
+        `json/changelog-{from}_{to}.json`. Runs on the same content version
+        get merged into the same file.
+        """
+        changelog = self.get_changelog()
+        console.print(f'{len(changelog["added"])} added, {len(changelog["modified"])} modified, {len(changelog["removed"])} removed ponies')
+
+        if changelog['from'] is None:
+            return
+        
+        path = os.path.join(
+            self.changelog_folder,
+            f'changelog-{changelog["from"]["content_version"]}_{changelog["to"]["content_version"]}.json',
+        )
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding = 'utf-8') as file:
+                old_changelog = json.load(file)
+            
+            added = set(old_changelog.get('added', [])) | set(changelog['added'])
+            removed = set(old_changelog.get('removed', [])) | set(changelog['removed'])
+            added, removed = added - set(changelog['removed']), removed - set(changelog['added'])
+
+            modified = old_changelog.get('modified', {})
+            for pony_id, parts in changelog['modified'].items():
+                modified[pony_id] = sorted(set(modified.get(pony_id, [])) | set(parts))
+            
+            changelog['added'] = sorted(added)
+            changelog['removed'] = sorted(removed)
+            changelog['modified'] = {
+                pony_id: parts for pony_id, parts in sorted(modified.items())
+                if pony_id not in added and pony_id not in removed
+            }
+        elif not (changelog['added'] or changelog['removed'] or changelog['modified']):
+            return
+        
+        write_if_changed(path, dump_json(changelog, compact = False))
+
+    @contextmanager
+    def timed(self, name: str, count: int | None = None):
+        """
+        Time a stage. The count of items can be given up front, or set on the
+        dict this gives back once it's known.
+
+        If this is the stage being profiled, it also gets run under cProfile.
+        """
+        stage = {'count': count}
+        profiler = None
+        if self.profile is not None and self.profile_stage == name:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        
+        start = time.perf_counter()
+        cpu_start = get_cpu_time()
+        try:
+            yield stage
+        finally:
+            add_timing(
+                self.timings,
+                name,
+                time.perf_counter() - start,
+                get_cpu_time() - cpu_start,
+                stage['count'],
+            )
+            if profiler is not None:
+                profiler.disable()
+                stats_path = self.get_profile_stats_path(name)
+                if os.path.dirname(stats_path):
+                    os.makedirs(os.path.dirname(stats_path), exist_ok = True)
+                profiler.dump_stats(stats_path)
+
+    def print_timings(self):
+        """
+        Print the timings that haven't been printed yet.
+        """
+        for name, timing in self.timings.items():
+            if name in self._printed_timings:
+                continue
+            self._printed_timings.add(name)
+
+            line = f'{name}: {timing["wall"]:.2f}s'
+            if timing['cpu'] is not None:
+                line += f' ({timing["cpu"]:.2f}s CPU)'
+            if timing['count']:
+                line += f', {timing["count"]:,} items'
+                if timing['wall'] > 0:
+                    line += f' ({timing["count"] / timing["wall"]:,.1f}/s)'
+            console.print(line)
+
+    def get_profile_stats_path(self, stage: str) -> str:
+        return os.path.splitext(self.profile)[0] + '.' + stage.replace(' ', '_') + '.prof'
+
+    def save_profile(self):
+        """
+        Save the timings of every stage as json, so runs can be compared.
+        Image steps (`image decode` etc.) are added up over all the workers,
+        so they can be more than the wall time of the `images` stage.
+        """
+        stages = {}
+        for name, timing in self.timings.items():
+            stages[name] = dict(timing)
+            stages[name]['per_second'] = (
+                timing['count'] / timing['wall']
+                if timing['count'] and timing['wall'] > 0 else None
+            )
+        
+        report = {
+            'game_version': self.version,
+            'content_version': self.content_version,
+            'created': datetime.now().isoformat(timespec = 'seconds'),
+            'python': sys.version.split()[0],
+            'jobs': self.jobs or os.cpu_count(),
+            'stages': stages,
+        }
+        if self.profile_stage is not None and self.profile_stage in self.timings:
+            report['profile_stats'] = self.get_profile_stats_path(self.profile_stage)
+        
+        if os.path.dirname(self.profile):
+            os.makedirs(os.path.dirname(self.profile), exist_ok = True)
+        with open(self.profile, 'w', encoding = 'utf-8') as file:
+            json.dump(report, file, indent = 2)
+        
+        console.print(f'saved profile to {self.profile}')
+
+    @property
+    def loc_files(self) -> list[LOC]:
+        """
+        The loc files only get loaded when they're needed if the game data
+        came from the snapshot.
+        """
+        if self._loc_files is None:
+            with self.timed('loc files', len(self.loc_filenames)):
+                self._loc_files = [load_loc(self.game_files.get_path(filename)) for filename in self.loc_filenames]
+        
+        return self._loc_files
+
+    @loc_files.setter
+    def loc_files(self, loc_files: list[LOC]):
+        self._loc_files = loc_files
+
+    def get_snapshot_key(self, snapshot_cache: SnapshotCache, paths: list[str]) -> str:
+        """
+        Get the snapshot key for these game files. Files in the arks are
+        keyed by where they are in their archive and the archive's size and
+        mtime, so they don't have to be extracted (or even read) to check it.
+        """
+        # forced encodings change how the files get read, and new categories
+        # wouldn't be in the snapshot
+        extra = [self.content_version, sorted(self.encodings.items()), GAMEOBJECT_CATEGORIES]
+        if self.game_files.has_paths:
+            return snapshot_cache.get_key([self.game_files.get_path(path) for path in paths], *extra)
+        
+        return snapshot_cache.get_key([], [self.game_files.get_entry_key(path) for path in paths], *extra)
+
+    def parse_game_files(self, loc_filenames: list[str]):
+        # loc files in the arks only get extracted once they're needed
+        loc_filenames = [self.game_files.get_path(filename) for filename in loc_filenames]
+        if self.jobs == 1:
+            console.print('Loading loc files')
+            with self.timed('loc files', len(loc_filenames)):
+                self.loc_files: list[LOC] = [load_loc(filename) for filename in loc_filenames]
+            
+            console.print('loading gameobjectdata.xml')
+            with self.timed('gameobjectdata.xml'):
+                self.load_gameobjectdata()
+        else:
+            # the loc files are loaded in other processes while this one
+            # parses the xml
+            console.print('Loading loc files and gameobjectdata.xml')
+            with ProcessPoolExecutor(max_workers = self.jobs) as executor:
+                loc_start = time.perf_counter()
+                loc_futures = [executor.submit(load_loc, filename) for filename in loc_filenames]
+                loc_end = loc_start
+
+                def loc_done(future):
+                    nonlocal loc_end
+                    loc_end = max(loc_end, time.perf_counter())
+                
+                for future in loc_futures:
+                    future.add_done_callback(loc_done)
+                
+                with self.timed('gameobjectdata.xml'):
+                    self.load_gameobjectdata()
+                
+                self.loc_files: list[LOC] = [future.result() for future in loc_futures]
+                # the loc files' CPU time is in the workers
+                add_timing(self.timings, 'loc files', loc_end - loc_start, count = len(loc_filenames))
+
+        with self.timed('defaultGameCampaign.json'):
+            with self.get_game_file('defaultGameCampaign.json') as file:
+                self.defaultGameCampaign: DefaultGameCampaignType = json.load(file)
+        self.daily_goals_shop = {
+            item['item_id']: item['cost']
+            for item in self.defaultGameCampaign.get('mini_games', {}).get('dailygoals', {}).get('itemshop', [])
+        }
+
+        if len(self.loc_files) == 0:
+            raise ValueError('Could not find loc files')
+        
+        keys = self.get_string_keys()
+        with self.timed('translation index', len(keys)):
+            self.translations = TranslationIndex(self.loc_files, keys)
+
+    def load_gameobjectdata(self):
+        with (
+            self.get_game_file('gameobjectdata.xml', 'rb') as gameobjectdata,
+            self.get_game_file('shopdata.xml', 'rb') as shopdata,
+            self.get_game_file('gameobjectcategorydata.xml', 'rb') as gameobjectcategorydata,
+        ):
+            if self.stream_categories:
+                start = time.perf_counter()
+                try:
+                    gameobjectdata = filter_categories(gameobjectdata, GAMEOBJECT_CATEGORIES)
+                except ParseError as e:
+                    # the time wasted streaming shows up as its own stage, so
+                    # it's in the timings and profile and not just a warning
+                    # that scrolls by
+                    add_timing(self.timings, 'stream fallback', time.perf_counter() - start, count = 1)
+                    console.print(f'[yellow]could not stream gameobjectdata.xml, parsing all of it[/]: {e}')
+                    gameobjectdata.seek(0)
+            
+            self.gameobjectdata = GameObjectData(
+                gameobjectdata,
+                shopdata,
+                gameobjectcategorydata,
+            )
+        return self.gameobjectdata
+
+    def get_loc_filenames(self) -> list[str]:
+        """
+        Get the loc files to load (as paths in the game files). If
+        `self.languages` is set, only the loc files named after those
+        languages are loaded (e.g. `english.loc`).
+        """
+        filenames = self.game_files.glob('*.loc')
+        if self.languages is not None:
+            languages = {normalize_language(language) for language in self.languages}
+            filenames = [filename for filename in filenames if get_loc_language(filename) in languages]
+
+            missing = languages - {get_loc_language(filename) for filename in filenames}
+            if missing:
+                console.print(f'[yellow]could not find loc files for {", ".join(sorted(missing))}')
+        
+        return filenames
+
+    def get_encoding(self, file_path: str, path: str | None = None) -> str:
+        """
+        Get the encoding of a file, unless it was forced with `encodings`
+        (either by `path` in the game folder or `file_path`).
+        """
+        for key in [path, file_path]:
+            if key is not None and normalize_path(key) in self.encodings:
+                return self.encodings[normalize_path(key)]
+        
+        return get_encoding(file_path, self.encoding_cache)
+
     def get_game_file(
         self,
         path: str,
         mode: str = 'r',
         encoding: str | None = None,
         newline: str | None = None,
+    ) -> IO:
+        """
+        Open a file from the game folder, or straight from the arks if the
+        game folder has the .ark files instead of the extracted game.
+
+        This gives back the open file instead of a copy of it in memory, so
+        parsers can stream it and text only gets decoded as it's read. Use it
+        in a `with` statement so the file gets closed.
+        """
+
+        if 'b' in mode:
+            return self.game_files.open(path)
+        
+        file_path = self.game_files.get_path(path)
+        
+        if encoding is None:
+            encoding = self.get_encoding(file_path, path)
+        
+        return open(
+            file_path,
+            'r',
+            encoding = encoding,
+            newline = newline,
+        )
+
+    def find_image_source(self, source: str) -> str | None:
+        """
+        Get the path to a texture from its name without the extension, or
+        `None` if there isn't one.
+        """
+        for extension in IMAGE_EXTENSIONS:
+            if self.game_files.exists(source + extension):
+                source += extension
+                break
+        else:
+            return None
+        
+        if not self.game_files.has_paths:
+            # read out of the archive when it's needed, in `extract_images()`
+            return normalize_game_path(source)
+        
+        return self.game_files.get_path(source)
+
+    def get_image_source_files(self, source: str) -> list[str]:
+        if self.game_files.has_paths:
+            return image_source_files(source)
+        
+        return image_source_files(source, self.game_files.exists)
+
+    def get_image_source_stat(self, source: str) -> tuple[int, float]:
+        if self.game_files.has_paths:
+            return get_source_stat(source)
+        
+        stats = [self.game_files.stat(path) for path in self.get_image_source_files(source)]
+        return sum(size for size, mtime in stats), max(mtime for size, mtime in stats)
+
+    def read_image_source(self, source: str) -> dict[str, bytes]:
+        return {path: self.game_files.read(path) for path in self.get_image_source_files(source)}
+
+    def add_image_job(
+        self,
+        id: str,
+        type: str,
+        source_path: str | None,
+        output: str,
     ):
         """
-        I may add opening files inside arks directly, so this'll be where I
-        add that functionality without redoing everything
+        The metadata pass only records which images are needed, the actual
+        decoding happens later in `extract_images()`.
         """
+        if source_path is None:
+            console.print(f'could not find {id} {type} image')
+            return
+        
+        self.image_jobs.append({
+            'id': id,
+            'type': type,
+            'source': source_path,
+            'output': output,
+            'variant_settings': self.image_variants,
+            'store': self.image_store,
+            'optimize': self.optimize_png is not None,
+        })
 
-        file_path = os.path.join(self.game_folder, path)
+    def get_image_path(self, output: str) -> str:
+        """
+        Get where the image for `output` was saved. With the content addressed
+        store that isn't `output`, and only the image manifest knows where it
+        is if the image doesn't get extracted this run (like with
+        `no_images`).
+        """
+        if self.image_manifest is None:
+            self.image_manifest = self.load_image_manifest()
+        
+        return self.image_manifest.get(output, {}).get('path', output)
 
-        with open(
-            file_path,
-            'rb',
-        ) as file:
-            if 'b' not in mode and encoding is None:
-                encoding = charset_normalizer.from_fp(file).best().encoding
-                file.seek(0)
+    def load_image_manifest(self) -> dict[str, dict]:
+        if not os.path.exists(self.image_manifest_path):
+            return {}
+        
+        with open(self.image_manifest_path, 'r', encoding = 'utf-8') as file:
+            manifest = json.load(file)
+        
+        return manifest.get('images', {})
 
-            if 'b' in mode:
-                result = io.BytesIO(file.read())
-            else:
-                result = io.StringIO(file.read().decode(encoding), newline = newline)
+    def save_image_manifest(self, images: dict[str, dict]):
+        os.makedirs(os.path.dirname(self.image_manifest_path), exist_ok = True)
+        with open(self.image_manifest_path, 'w', encoding = 'utf-8') as file:
+            json.dump({
+                'version': 1,
+                'images': images,
+            }, file, indent = 2)
+
+    def extract_images(self):
+        """
+        Extract all the recorded images on a process pool with `self.jobs`
+        workers (all cores if `None`, in process if `1`).
+
+        The image manifest (in the cache folder) remembers the size, mtime and
+        hash of every source, so unchanged sources are skipped without even
+        being read, unless `self.force_images` is set.
+        """
+        if len(self.image_jobs) == 0:
+            return
+        
+        for folder in set(job['store'] or os.path.dirname(job['output']) for job in self.image_jobs):
+            os.makedirs(folder, exist_ok = True)
+
+        manifest = self.load_image_manifest()
+
+        jobs: list[dict] = []
+        skipped = 0
+        for job in self.image_jobs:
+            job['size'], job['mtime'] = self.get_image_source_stat(job['source'])
+
+            entry = manifest.get(job['output'])
+            if (
+                entry is None
+                or self.force_images
+                or entry.get('source') != job['source']
+                or entry.get('store') != job['store']
+                or (self.optimize_png == 'all' and not entry.get('optimized'))
+                or not has_variants(entry, job)
+            ):
+                jobs.append(job)
+                continue
+            
+            job['path'] = entry.get('path', job['output'])
+            if entry.get('size') == job['size'] and entry.get('mtime') == job['mtime'] and os.path.exists(job['path']):
+                skipped += 1
+                continue
+            
+            job['source_hash'] = entry.get('source_hash')
+            jobs.append(job)
+
+        # jobs with the same source go to the same worker, so it only has to
+        # decode the texture once
+        groups: dict[str, list[dict]] = {}
+        for job in jobs:
+            groups.setdefault(os.path.realpath(job['source']), []).append(job)
+
+        failed: list[dict] = []
+        updated = 0
+        texture_stats = {'decoded': 0, 'reused': 0}
+        optimized = 0
+        optimize_saved = 0
+
+        def add_result(result: dict):
+            nonlocal updated, optimized, optimize_saved
+            for step, timing in result['timings'].items():
+                add_timing(self.timings, f'image {step}', **timing)
+            if 'texture' in result:
+                texture_stats[result['texture']] += 1
+
+            if result['error'] is not None:
+                manifest.pop(result['output'], None)
+                failed.append(result)
+                return
+            
+            if result['status'] == 'updated':
+                updated += 1
+                # reused textures and images already in the store weren't
+                # written again, so they didn't save anything this run
+                if result.get('optimized'):
+                    optimized += 1
+                    optimize_saved += result['optimize_saved']
+            
+            entry = manifest.setdefault(result['output'], {})
+            entry.update({
+                'source': result['source'],
+                'size': result['size'],
+                'mtime': result['mtime'],
+                'source_hash': result['source_hash'],
+                'path': result['path'],
+                'store': result['store'],
+            })
+            for key in ['output_hash', 'output_size', 'crop', 'optimized']:
+                if key in result:
+                    entry[key] = result[key]
+            if 'variants' in result:
+                entry['variants'] = result['variants']
+                entry['variant_settings'] = result['variant_settings']
+
+        def read_group(group: list[dict]) -> list[dict]:
+            # textures that aren't on disk (in .ark archives) get sent to the
+            # workers in memory
+            if self.game_files.has_paths:
+                return group
+            
+            return [{**job, 'data': self.read_image_source(job['source'])} for job in group]
+
+        # cProfile can't see into the workers
+        if self.jobs == 1 or len(groups) <= 1 or (self.profile is not None and self.profile_stage == 'images'):
+            for results in track(
+                map(extract_image_group, map(read_group, groups.values())),
+                total = len(groups),
+                description = 'Extracting images...',
+            ):
+                for result in results:
+                    add_result(result)
+        else:
+            with ProcessPoolExecutor(max_workers = self.jobs) as executor:
+                pending = iter(groups.values())
+                futures = set()
+
+                def submit_next():
+                    group = next(pending, None)
+                    if group is not None:
+                        futures.add(executor.submit(extract_image_group, read_group(group)))
+
+                def completed():
+                    # only a few groups are queued at a time, so the textures
+                    # read out of archives aren't all in memory at once
+                    for _ in range((self.jobs or os.cpu_count() or 1) * 2):
+                        submit_next()
+                    while futures:
+                        done, _ = wait(futures, return_when = FIRST_COMPLETED)
+                        for future in done:
+                            futures.remove(future)
+                            submit_next()
+                            yield future
+
+                for future in track(
+                    completed(),
+                    total = len(groups),
+                    description = 'Extracting images...',
+                ):
+                    for result in future.result():
+                        add_result(result)
         
-        return result
+        self.save_image_manifest(manifest)
+
+        failed_outputs = {result['output'] for result in failed}
+        for job in self.image_jobs:
+            if job['output'] not in failed_outputs:
+                entry = manifest[job['output']]
+                self.categories['ponies']['items'][job['id']]['image'][job['type']] = '/' + entry.get('path', job['output'])
+                self.set_image_variants(job['id'], job['type'], entry.get('variants', []))
+        
+        for result in failed:
+            console.print(f'[red]could not extract {result["id"]} {result["type"]} image[/]: {result["error"]}')
+        
+        console.print(f'{len(self.image_jobs)} images: {updated} updated, {skipped} skipped, {len(jobs) - updated - len(failed)} unchanged, {len(failed)} failed')
+        console.print(f'textures: {texture_stats["decoded"]} decoded, {texture_stats["reused"]} reused')
+        if self.optimize_png is not None:
+            console.print(f'optimized {optimized} images, {optimize_saved / 1024:.1f} KiB saved')
+
+    def clean_image_store(self):
+        """
+        Remove the images in the store that no pony uses anymore, and show how
+        much space sharing them saved.
+        """
+        references: dict[str, int] = {}
+        used = set()
+        for pony_info in self.categories['ponies']['items'].values():
+            image = pony_info.get('image', {})
+            for type in ['portrait', 'full']:
+                path = image.get(type, '')[1:]
+                if os.path.dirname(path) == self.image_store:
+                    references[path] = references.get(path, 0) + 1
+                    used.add(path)
+            for variants in image.get('variants', {}).values():
+                used.update(variant['path'][1:] for variant in variants)
+        
+        removed = 0
+        for path in glob(os.path.join(self.image_store, '*')):
+            if normalize_path(path) not in used:
+                os.remove(path)
+                removed += 1
+
+        duplicates = 0
+        saved = 0
+        for path, count in references.items():
+            if os.path.exists(path):
+                duplicates += count - 1
+                saved += (count - 1) * os.path.getsize(path)
+        
+        console.print(
+            f'{sum(references.values())} images stored as {len(references)} files: '
+            f'{duplicates} duplicates, {saved / 1024 / 1024:.2f} MiB saved, {removed} unused files removed'
+        )
+
+    def build_portrait_atlas(self) -> int:
+        """
+        Pack thumbnails of all the portraits into a few sheets, so pages that
+        show a lot of ponies at once don't need a request for each one.
+        game-data.json gets `portrait_atlas` with where the map and css are.
+
+        Returns:
+            int: How many portraits are in the atlas.
+        """
+        ponies = self.categories['ponies']['items']
+        images = {}
+        for pony_id, pony_info in sorted(ponies.items(), key = lambda item: item[1].get('index', 0)):
+            path = pony_info.get('image', {}).get('portrait', '')[1:]
+            if path and os.path.exists(path):
+                images[pony_id] = path
+        
+        folder = normalize_path(os.path.relpath(os.path.join(self.images_folder, 'ponies', 'atlas')))
+        atlas = build_atlas(
+            images,
+            folder,
+            'portrait',
+            '/' + folder,
+            self.portrait_atlas,
+        )
+
+        self.game_data['portrait_atlas'] = {
+            'map': f'/{folder}/portrait.json',
+            'css': f'/{folder}/portrait.css',
+            'sheets': atlas['sheets'],
+            'thumbnail_size': self.portrait_atlas,
+        }
+        console.print(f'{len(atlas["items"])} portraits in {len(atlas["sheets"])} atlas sheets')
+        return len(atlas['items'])
+
+    def set_image_variants(self, pony_id: str, type: str, variants: list[dict]):
+        """
+        The variants go in `image.variants` instead of next to the image
+        paths, since the site expects those to be strings.
+        """
+        image = self.categories['ponies']['items'][pony_id]['image']
+        if variants:
+            image.setdefault('variants', {})[type] = variants
+        elif 'variants' in image:
+            image['variants'].pop(type, None)
+            if not image['variants']:
+                del image['variants']
+
+    def check_wiki_status(self):
+        """
+        Check all the wiki pages gathered by `get_ponies()` at once, so they
+        can be batched into api queries and run concurrently instead of one
+        pony at a time. Results are cached in the cache folder, not in
+        game-data.json.
+        """
+        with WikiChecker(
+            api_urls = WIKI_API_URLS if self.wiki_api else None,
+        ) as checker, WikiCache(
+            self.wiki_cache_path,
+            ttl_exists = timedelta(days = self.wiki_ttl['exists']),
+            ttl_missing = timedelta(days = self.wiki_ttl['missing']),
+            ttl_redirect = timedelta(days = self.wiki_ttl['redirect']),
+        ) as cache:
+            for page, error in track(
+                checker.check(self.wiki_pages, cache),
+                total = len(self.wiki_pages),
+                description = 'Checking wiki...',
+            ):
+                if error is not None:
+                    console.print(f'[red]could not check [blue]{page["url"]}[/]: {error}')
+                elif not page['result']['exists']:
+                    console.print(f'[red]no page for [blue]{page["url"]}[/]')
+
+    def get_string_keys(self) -> set[str]:
+        """
+        Get all the loc keys used by the game objects we get, so only those
+        have to go in the translation index.
+        """
+        keys = {'STR_STORE_PONIES'}
+        for pony in self.gameobjectdata['Pony'].values():
+            for component in pony.values():
+                if isinstance(component, dict) and isinstance(component.get('Unlocal'), str):
+                    keys.add(component['Unlocal'])
+        
+        return keys
 
     def get_content_version(self):
-        self.content_version = parse_xml(self.get_game_file('data_ver.xml', 'rb'))[0].attrib['Value']
+        with self.get_game_file('data_ver.xml', 'rb') as file:
+            self.content_version = parse_xml(file)[0].attrib['Value']
         return self.content_version
 
+    def get_texture_hash(self, pony_id: str, type: str, source: str) -> dict:
+        """
+        Hash a texture (with its alpha), reusing the hash from the last run if
+        the size and mtime are the same.
+        """
+        size, mtime = self.get_image_source_stat(source)
+        old = self.old_fingerprints['ponies'].get(pony_id, {}).get('textures', {}).get(type)
+        if old is not None and old['source'] == source and old['size'] == size and old['mtime'] == mtime:
+            return old
+        
+        return {
+            'source': source,
+            'size': size,
+            'mtime': mtime,
+            'hash': (
+                hash_files(image_source_files(source))
+                if self.game_files.has_paths
+                else hash_data(self.read_image_source(source).values())
+            ),
+        }
+
+    def get_pony_fingerprint(
+        self,
+        pony: GameObject,
+        pony_info: dict,
+        image_sources: dict[str, str | None],
+    ) -> dict:
+        """
+        Get the hashes of everything a pony's info is made from: its game
+        object, shop data, strings (per language) and textures, plus the
+        settings for this run, like the version of this script.
+        """
+        if self.no_images:
+            # the textures aren't looked at, so keep the last hashes for the
+            # next run to compare to (and reuse)
+            textures = self.old_fingerprints['ponies'].get(pony.id, {}).get('textures', {})
+        else:
+            textures = {
+                type: self.get_texture_hash(pony.id, type, source)
+                for type, source in image_sources.items()
+                if source is not None
+            }
+
+        strings = {}
+        for component in ['Name', 'Description']:
+            key = pony.get(component, {}).get('Unlocal', '')
+            for lang, string in self.translations.translate(key).items():
+                strings.setdefault(lang, []).append(string)
+
+        return {
+            'fingerprint': {
+                'settings': hash_json([
+                    self.code_hash,
+                    self.no_images,
+                    self.images_folder,
+                    self.image_variants,
+                    self.image_store,
+                    self.optimize_png,
+                    pony_info.get('locked', False),
+                ]),
+                'data': hash_json([
+                    pony.id,
+                    get_plain_data(pony),
+                    pony.id in NPC_PONIES,
+                    pony.id in QUEST_PONIES,
+                    pony.id in UNUSED_PONIES,
+                    self.daily_goals_shop.get(pony.id, 0),
+                ]),
+                'shop': hash_json(get_plain_data(self.gameobjectdata.get_object_shopdata(pony.id))),
+                'strings': {lang: hash_json(value) for lang, value in strings.items()},
+                'images': {type: texture['hash'] for type, texture in textures.items()},
+            },
+            'textures': textures,
+        }
+
+    def is_pony_unchanged(self, pony_id: str, fingerprint: dict, image_paths: list[str]) -> bool:
+        if not self.incremental or self.migrate or self.force_images:
+            return False
+        
+        old = self.old_fingerprints['ponies'].get(pony_id)
+        if old is None or old['fingerprint'] != fingerprint['fingerprint']:
+            return False
+        
+        # game-data.json could have been edited by hand
+        if 'wiki_path' not in self.categories['ponies']['items'].get(pony_id, {}):
+            return False
+        
+        if not self.no_images and not all(os.path.exists(path) for path in image_paths):
+            return False
+        
+        return True
+
     def get_ponies(self):
         self.categories.setdefault('ponies', {})
 
-        self.categories['ponies']['name'] = translate('STR_STORE_PONIES', self.loc_files)
+        self.categories['ponies']['name'] = self.translations.translate('STR_STORE_PONIES')
         self.categories['ponies'].setdefault('clones', {})
 
         self.categories['ponies'] = {
@@ -360,11 +1907,54 @@ class GetGameData:
         groups = {}
 
         index = 0
+        unchanged = 0
         for pony in track(
             self.gameobjectdata['Pony'].values(),
             description = 'Gathering ponies...',
         ):
             try:
+                portrait_image_path = normalize_path(os.path.relpath(os.path.join(self.images_folder, 'ponies', 'portrait', f'{pony.id}.png')))
+                full_image_path = normalize_path(os.path.relpath(os.path.join(self.images_folder, 'ponies', 'full', f'{pony.id}.png')))
+
+                # without images, the textures don't need to be found or hashed
+                image_sources = {'portrait': None, 'full': None}
+                if not self.no_images:
+                    image_sources = {
+                        'portrait': self.find_image_source(pony.get('Icon', {}).get('Url')),
+                        'full': self.find_image_source(os.path.splitext(pony.get('Shop', {}).get('Icon'))[0]),
+                    }
+
+                fingerprint = self.get_pony_fingerprint(pony, ponies.get(pony.id, {}), image_sources)
+                self.fingerprints[pony.id] = fingerprint
+
+                if self.is_pony_unchanged(
+                    pony.id,
+                    fingerprint,
+                    [
+                        ponies.get(pony.id, {}).get('image', {}).get(type, '')[1:]
+                        for type, source in image_sources.items()
+                        if source is not None
+                    ],
+                ):
+                    # only the things that depend on the other ponies
+                    pony_info = ponies[pony.id]
+                    pony_info['index'] = index
+
+                    group = self.old_fingerprints['ponies'][pony.id]['group']
+                    for id in group:
+                        groups[id] = group
+                    pony_info['group'] = fingerprint['group'] = group
+
+                    pony_info['wiki'], wiki_pages = get_wiki_pages(
+                        pony_info['wiki_path'],
+                        pony_info.get('wiki'),
+                    )
+                    self.wiki_pages.extend(wiki_pages)
+
+                    unchanged += 1
+                    index += 1
+                    continue
+
                 pony_info = ponies.setdefault(pony.id, {})
                 if self.migrate:
                     pony_info = ponies[pony.id] = {
@@ -404,16 +1994,14 @@ class GetGameData:
 
                 # strings
 
-                pony_info['name'] = translate(
+                pony_info['name'] = self.translations.translate(
                     pony.get('Name', {}).get('Unlocal', ''),
-                    self.loc_files,
                     pony_info.setdefault('name', {}),
                     pony_info.get('locked', False),
                 )
 
-                pony_info['description'] = translate(
+                pony_info['description'] = self.translations.translate(
                     pony.get('Description', {}).get('Unlocal', ''),
-                    self.loc_files,
                     pony_info.setdefault('description', {}),
                     pony_info.get('locked', False),
                 )
@@ -431,48 +2019,25 @@ class GetGameData:
 
                 images = pony_info.setdefault('image', {})
 
-                os.makedirs(os.path.join(self.images_folder, 'ponies', 'portrait'), exist_ok = True)
-                os.makedirs(os.path.join(self.images_folder, 'ponies', 'full'), exist_ok = True)
-
-                portrait_image_path = normalize_path(os.path.relpath(os.path.join(self.images_folder, 'ponies', 'portrait', f'{pony.id}.png')))
-                images['portrait'] = '/' + portrait_image_path
-
-                portrait_image_name = pony.get('Icon', {}).get('Url')
-                portrait_image_source = os.path.join(self.game_folder, portrait_image_name)
+                images['portrait'] = '/' + self.get_image_path(portrait_image_path)
 
                 if not self.no_images:
-                    portrait_image = None
-                    if os.path.exists(portrait_image_source + '.png'):
-                        portrait_image = Image.open(portrait_image_source + '.png')
-                    elif os.path.exists(portrait_image_source + '.pvr'):
-                        portrait_image = PVR(portrait_image_source + '.pvr', external_alpha = True).image
-                    else:
-                        console.print(f'could not find {pony.id} portrait')
-                
-                    if portrait_image is not None:
-                        portrait_image = crop_image(portrait_image)
-                        portrait_image.save(portrait_image_path)
-                    
-                
+                    self.add_image_job(
+                        pony.id,
+                        'portrait',
+                        image_sources['portrait'],
+                        portrait_image_path,
+                    )
 
-                full_image_path = normalize_path(os.path.relpath(os.path.join(self.images_folder, 'ponies', 'full', f'{pony.id}.png')))
-                images['full'] = '/' + full_image_path
-
-                full_image_name = os.path.splitext(pony.get('Shop', {}).get('Icon'))[0]
-                full_image_source = os.path.join(self.game_folder, full_image_name)
+                images['full'] = '/' + self.get_image_path(full_image_path)
 
                 if not self.no_images:
-                    full_image = None
-                    if os.path.exists(full_image_source + '.png'):
-                        full_image = Image.open(full_image_source + '.png')
-                    elif os.path.exists(full_image_source + '.pvr'):
-                        full_image = PVR(full_image_source + '.pvr', external_alpha = True).image
-                    else:
-                        console.print(f'could not find {pony.id} full image')
-                
-                    if full_image is not None:
-                        full_image = crop_image(full_image)
-                        full_image.save(full_image_path)
+                    self.add_image_job(
+                        pony.id,
+                        'full',
+                        image_sources['full'],
+                        full_image_path,
+                    )
 
                 # more metadata
                 
@@ -507,7 +2072,7 @@ class GetGameData:
                 for id in group:
                     groups[id] = group
                 
-                pony_info['group'] = group
+                pony_info['group'] = fingerprint['group'] = group
 
                 # star rewards
 
@@ -575,11 +2140,11 @@ class GetGameData:
                 wiki_path = urllib.parse.quote(pony_info['name'].get('english', '').replace(' ', '_'))
 
                 wiki_path = pony_info.setdefault('wiki_path', wiki_path)
-                pony_info['wiki'] = check_wiki(
+                pony_info['wiki'], wiki_pages = get_wiki_pages(
                     wiki_path,
                     pony_info.get('wiki'),
-                    self.check_wiki,
                 )
+                self.wiki_pages.extend(wiki_pages)
 
                 ponies[pony.id] = {
                     'locked': pony_info['locked'],
@@ -614,6 +2179,11 @@ class GetGameData:
         for pony_id, group in groups.items():
             ponies[pony_id]['group'] = group
         
+        if unchanged:
+            console.print(f'{unchanged} ponies unchanged since the last run')
+        
+        self.translations.print_missing()
+        
         
 
 def main():
@@ -625,7 +2195,7 @@ def main():
 
     argparser.add_argument(
         '-g', '--game-folder',
-        help = 'Game folder',
+        help = 'Game folder, either extracted or with the .ark files',
         required = True,
     )
 
@@ -653,14 +2223,191 @@ def main():
         action = 'store_true',
     )
 
+    argparser.add_argument(
+        '-wh', '--wiki-head',
+        help = 'Check wiki status with a HEAD request per page instead of the MediaWiki api',
+        action = 'store_true',
+    )
+
+    for result, default in [('exists', 30), ('missing', 1), ('redirect', 7)]:
+        argparser.add_argument(
+            f'--wiki-ttl-{result}',
+            help = f'Days to cache {result} wiki results for (default {default})',
+            type = float,
+            default = default,
+        )
+
+    argparser.add_argument(
+        '-j', '--jobs',
+        help = 'Number of processes to extract images with (defaults to all cores)',
+        type = int,
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-c', '--cache-folder',
+        help = 'Folder to keep the image manifest and other caches in',
+        default = '.cache',
+    )
+
+    argparser.add_argument(
+        '-fi', '--force-images',
+        action = 'store_true',
+        help = 'Re-extract images even if the source is unchanged',
+    )
+
+    argparser.add_argument(
+        '-l', '--languages',
+        nargs = '+',
+        help = 'Only load these languages (by loc file name, e.g. english), for faster development runs',
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-e', '--encoding',
+        action = 'append',
+        metavar = 'FILE=ENCODING',
+        help = 'Force the encoding of a file instead of detecting it, e.g. defaultGameCampaign.json=utf-8 (can be used multiple times)',
+        default = [],
+    )
+
+    argparser.add_argument(
+        '-s', '--sharded',
+        action = 'store_true',
+        help = 'Also save the game data split into an index, language and category files',
+    )
+
+    argparser.add_argument(
+        '-m', '--minified',
+        action = 'store_true',
+        help = 'Also save minified game data with .gz and .br (if brotli is installed) versions',
+    )
+
+    argparser.add_argument(
+        '-i', '--intern-strings',
+        action = 'store_true',
+        help = 'Also save the game data with a deduplicated string table (game-data.interned.json)',
+    )
+
+    argparser.add_argument(
+        '-is', '--image-sizes',
+        nargs = '+',
+        type = int,
+        metavar = 'SIZE',
+        help = 'Also save each image scaled down to fit in these sizes (as webp unless --image-formats is used)',
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-if', '--image-formats',
+        nargs = '+',
+        choices = list(IMAGE_FORMATS),
+        help = 'Also save each image (and each of --image-sizes) in these formats',
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-pa', '--portrait-atlas',
+        nargs = '?',
+        type = int,
+        const = 64,
+        metavar = 'SIZE',
+        help = 'Also pack the portraits into atlas sheets, as thumbnails that fit in SIZE (default 64)',
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-ca', '--content-addressed',
+        action = 'store_true',
+        help = 'Save each unique image once in images/store, named by its hash, instead of once per pony',
+    )
+
+    argparser.add_argument(
+        '-op', '--optimize-png',
+        nargs = '?',
+        choices = ['all', 'changed'],
+        const = 'all',
+        help = 'Save images with the smallest lossless png encoding. "changed" only does new and changed images, "all" (the default) also does the ones that were saved before',
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-sc', '--stream-categories',
+        action = 'store_true',
+        help = 'Stream gameobjectdata.xml and only parse the categories that are used',
+    )
+
+    argparser.add_argument(
+        '-p', '--profile',
+        metavar = 'FILE',
+        help = 'Save the wall time, CPU time and item count of every stage to a json file',
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-ps', '--profile-stage',
+        metavar = 'STAGE',
+        help = 'Also run this stage (e.g. images, ponies, "loc files") under cProfile, saved next to the --profile file. Images get extracted in this process when profiled',
+        default = None,
+    )
+
+    argparser.add_argument(
+        '-ns', '--no-snapshot',
+        action = 'store_true',
+        help = 'Parse the game files even if they are the same as the parsed snapshot in the cache folder',
+    )
+
+    argparser.add_argument(
+        '-F', '--full-rebuild',
+        action = 'store_true',
+        help = "Reprocess every pony, even the ones whose source data didn't change since the last run",
+    )
+
     args = argparser.parse_args()
 
+    if args.profile_stage is not None and args.profile is None:
+        argparser.error('--profile-stage needs --profile')
+
+    if args.image_formats and not any(is_image_format_supported(format) for format in args.image_formats):
+        argparser.error(f'this version of Pillow can\'t save any of --image-formats {" ".join(args.image_formats)}')
+
+    encodings = {}
+    for encoding in args.encoding:
+        path, sep, encoding = encoding.rpartition('=')
+        if not sep:
+            argparser.error(f'--encoding must be FILE=ENCODING, got {encoding}')
+        encodings[path] = encoding
+
     GetGameData(
         args.version,
         args.game_folder,
         args.output,
         args.no_images,
         args.wiki_status,
+        args.jobs,
+        args.cache_folder,
+        args.force_images,
+        not args.wiki_head,
+        {
+            'exists': args.wiki_ttl_exists,
+            'missing': args.wiki_ttl_missing,
+            'redirect': args.wiki_ttl_redirect,
+        },
+        args.languages,
+        encodings,
+        args.sharded,
+        args.minified,
+        args.intern_strings,
+        not args.full_rebuild,
+        not args.no_snapshot,
+        args.stream_categories,
+        args.image_sizes,
+        args.image_formats,
+        args.portrait_atlas,
+        args.content_addressed,
+        args.optimize_png,
+        args.profile,
+        args.profile_stage,
     )
 
     return
@@ -0,0 +1,403 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import os
+import sqlite3
+import threading
+from typing import Callable, Iterator, Optional
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+WIKI_URLS = {
+    'indie': 'https://mlp-game-wiki.no/index.php/',
+    'fandom': 'https://mlp-gameloft.fandom.com/wiki/',
+}
+
+# MediaWiki api.php endpoints, wikis that aren't here get checked with HEAD
+# requests instead
+WIKI_API_URLS = {
+    'indie': 'https://mlp-game-wiki.no/api.php',
+    'fandom': 'https://mlp-gameloft.fandom.com/api.php',
+}
+
+# max titles per query for normal users
+API_TITLES_LIMIT = 50
+
+WIKI_PAGES = {
+    'indie': {
+        'page': '{name}',
+        '2d_image': 'File:{name}_2d.png',
+        'portrait': 'File:{name}_portrait.png',
+    },
+    'fandom': {
+        'page': '{name}',
+    }
+}
+
+
+def get_wiki_pages(
+    name: str,
+    result: Optional[dict] = None,
+    wiki_urls: dict[str, str] = WIKI_URLS,
+    wiki_pages: dict[str, dict[str, str]] = WIKI_PAGES,
+) -> tuple[dict, list[dict]]:
+    """
+    Fill in the wiki status dict for a pony, and get the pages to check. How
+    often they actually get checked is up to the `WikiCache`.
+
+    Each page to check is a dict with the `result` to update, the `path` to
+    set, the `url` to check and the `wiki` it's on.
+    """
+    if not isinstance(result, dict):
+        result = {}
+
+    pages = []
+
+    for wiki, wiki_url in wiki_urls.items():
+        if not wiki_url.endswith('/') and not wiki_url.endswith('\\'):
+            wiki_url += '/'
+
+        wiki_result = result.setdefault(wiki, {})
+        for page, url_template in wiki_pages[wiki].items():
+            path = url_template.format(name = name)
+            page_result: dict = wiki_result.setdefault(page, {
+                'exists': False,
+                'redirect': False,
+                'path': path,
+            })
+            # this used to be stored in game-data.json, now it's in the cache
+            page_result.pop('timestamp', None)
+
+            pages.append({
+                'result': page_result,
+                'path': path,
+                'url': wiki_url + path,
+                'wiki': wiki,
+            })
+
+    return result, pages
+
+def set_page_result(page: dict, exists: bool, redirect: bool):
+    page['result']['path'] = page['path']
+    page['result']['exists'] = exists
+    page['result']['redirect'] = exists and redirect
+
+def parse_status_code(status_code: int) -> tuple[bool, bool]:
+    return status_code in (200, 301), status_code == 301
+
+def parse_query_response(titles: list[str], response: dict) -> dict[str, tuple[bool, bool]]:
+    """
+    Get whether each title exists and whether it's a redirect from an
+    `action=query&redirects` response. Works with formatversion 1 and 2.
+
+    Returns:
+        dict[str, tuple[bool, bool]]: `{title: (exists, redirect)}`
+    """
+    query = response['query']
+
+    normalized = {item['from']: item['to'] for item in query.get('normalized', [])}
+    redirects = {item['from']: item['to'] for item in query.get('redirects', [])}
+    pages = query.get('pages', [])
+    if isinstance(pages, dict):
+        pages = pages.values()
+    pages = {page['title']: page for page in pages}
+
+    result = {}
+    for title in titles:
+        target = normalized.get(title, title)
+        redirect = target in redirects
+        seen = set()
+        while target in redirects and target not in seen:
+            seen.add(target)
+            target = redirects[target]
+        
+        page = pages.get(target)
+        exists = page is not None and 'missing' not in page and 'invalid' not in page
+        result[title] = (exists, redirect)
+    
+    return result
+
+
+class WikiChecker:
+    def __init__(
+        self,
+        max_workers: int = 16,
+        max_per_host: int = 4,
+        timeout: float = 10,
+        retries: int = 3,
+        backoff: float = 0.5,
+        api_urls: Optional[dict[str, str]] = WIKI_API_URLS,
+    ) -> None:
+        """
+        Checks wiki pages concurrently. Each host gets its own keep-alive
+        session, and at most `max_per_host` requests are sent to the same host
+        at once. Failed connections and 429/5xx responses are retried with
+        exponential backoff.
+
+        Wikis in `api_urls` are looked up through the MediaWiki query api, 50
+        titles at a time. If the api doesn't work, those pages fall back to
+        HEAD requests. Set `api_urls` to `None` to only use HEAD requests.
+        """
+        self.api_urls = api_urls or {}
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self._lock = threading.Lock()
+        self._sessions: dict[str, requests.Session] = {}
+        self._host_limits: dict[str, threading.BoundedSemaphore] = {}
+
+    def get_session(self, host: str) -> tuple[requests.Session, threading.BoundedSemaphore]:
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                session.headers['User-Agent'] = 'all-the-ponies wiki checker (https://all-the-ponies.github.io)'
+                adapter = HTTPAdapter(
+                    pool_connections = 1,
+                    pool_maxsize = self.max_per_host,
+                    max_retries = Retry(
+                        total = self.retries,
+                        backoff_factor = self.backoff,
+                        status_forcelist = [429, 500, 502, 503, 504],
+                        allowed_methods = ['HEAD', 'GET'],
+                        # we want the status code, not an exception
+                        raise_on_status = False,
+                        respect_retry_after_header = True,
+                    ),
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+
+            return self._sessions[host], self._host_limits[host]
+
+    def get_status(self, url: str) -> int:
+        session, limit = self.get_session(urllib.parse.urlsplit(url).netloc)
+        with limit:
+            response = session.head(
+                url,
+                timeout = self.timeout,
+                allow_redirects = False,
+            )
+        return response.status_code
+
+    def query_titles(self, api_url: str, titles: list[str]) -> dict[str, tuple[bool, bool]]:
+        session, limit = self.get_session(urllib.parse.urlsplit(api_url).netloc)
+        with limit:
+            response = session.get(
+                api_url,
+                params = {
+                    'action': 'query',
+                    'titles': '|'.join(titles),
+                    'redirects': 1,
+                    'format': 'json',
+                    'formatversion': 2,
+                },
+                timeout = self.timeout,
+            )
+        response.raise_for_status()
+        return parse_query_response(titles, response.json())
+
+    def check(
+        self,
+        pages: list[dict],
+        cache: Optional['WikiCache'] = None,
+    ) -> Iterator[tuple[dict, Exception | None]]:
+        """
+        Check pages from `get_wiki_pages()`, and write the results back into
+        each page's `result`. This yields every page as soon as it's done,
+        along with the error if it couldn't be checked (in which case the
+        result is left alone).
+
+        Pages that have a fresh result in the `cache` don't get checked, and
+        new results get saved to it.
+
+        Results are only written from the calling thread.
+        """
+        if len(pages) == 0:
+            return
+
+        def done(page: dict, exists: bool, redirect: bool):
+            set_page_result(page, exists, redirect)
+            if cache is not None:
+                cache.set(page['wiki'], page['path'], exists, redirect)
+
+        if cache is not None:
+            uncached = []
+            for page in pages:
+                cached = cache.get(page['wiki'], page['path'])
+                if cached is None:
+                    uncached.append(page)
+                else:
+                    set_page_result(page, *cached)
+                    yield page, None
+            pages = uncached
+
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            futures: dict[Future, tuple[str, list[dict]]] = {}
+
+            def probe(pages: list[dict]):
+                for page in pages:
+                    futures[executor.submit(self.get_status, page['url'])] = ('head', [page])
+
+            api_pages: dict[str, dict[str, list[dict]]] = {}
+            head_pages = []
+            for page in pages:
+                if page['wiki'] in self.api_urls:
+                    title = urllib.parse.unquote(page['path'])
+                    api_pages.setdefault(page['wiki'], {}).setdefault(title, []).append(page)
+                else:
+                    head_pages.append(page)
+
+            for wiki, titles in api_pages.items():
+                titles = list(titles.items())
+                for start in range(0, len(titles), API_TITLES_LIMIT):
+                    batch = dict(titles[start:start + API_TITLES_LIMIT])
+                    future = executor.submit(self.query_titles, self.api_urls[wiki], list(batch))
+                    futures[future] = ('api', batch)
+
+            probe(head_pages)
+
+            while futures:
+                finished, _ = wait(futures, return_when = FIRST_COMPLETED)
+                for future in finished:
+                    type, batch = futures.pop(future)
+                    if type == 'api':
+                        try:
+                            results = future.result()
+                        except (requests.RequestException, ValueError, KeyError, TypeError):
+                            # not a working MediaWiki api
+                            probe([page for title_pages in batch.values() for page in title_pages])
+                            continue
+
+                        for title, title_pages in batch.items():
+                            for page in title_pages:
+                                done(page, *results[title])
+                                yield page, None
+                    else:
+                        page = batch[0]
+                        try:
+                            status_code = future.result()
+                        except requests.RequestException as e:
+                            yield page, e
+                            continue
+
+                        done(page, *parse_status_code(status_code))
+                        yield page, None
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._host_limits.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class WikiCache:
+    def __init__(
+        self,
+        path: str,
+        ttl_exists: timedelta = timedelta(days = 30),
+        ttl_missing: timedelta = timedelta(days = 1),
+        ttl_redirect: timedelta = timedelta(days = 7),
+        now: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        """
+        Wiki page status cache, stored in an sqlite database. Each result is
+        kept for a different amount of time depending on whether the page
+        exists, is missing or is a redirect.
+
+        `now` gets the current time, so tests can use a fake clock.
+        """
+        self.path = path
+        self.now = now
+        self.ttl_exists = ttl_exists
+        self.ttl_missing = ttl_missing
+        self.ttl_redirect = ttl_redirect
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok = True)
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                wiki TEXT NOT NULL,
+                path TEXT NOT NULL,
+                exists_ INTEGER NOT NULL,
+                redirect INTEGER NOT NULL,
+                checked REAL NOT NULL,
+                PRIMARY KEY (wiki, path)
+            )
+        """)
+        self.connection.commit()
+        self._pending = 0
+
+    def get_ttl(self, exists: bool, redirect: bool) -> timedelta:
+        if not exists:
+            return self.ttl_missing
+        if redirect:
+            return self.ttl_redirect
+        return self.ttl_exists
+
+    def get(self, wiki: str, path: str) -> tuple[bool, bool] | None:
+        """
+        Get the cached `(exists, redirect)` for a page, or `None` if it hasn't
+        been checked or the result has expired.
+        """
+        row = self.connection.execute(
+            'SELECT exists_, redirect, checked FROM pages WHERE wiki = ? AND path = ?',
+            (wiki, path),
+        ).fetchone()
+        if row is None:
+            return None
+        
+        exists, redirect, checked = bool(row[0]), bool(row[1]), row[2]
+        if self.now() - datetime.fromtimestamp(checked) >= self.get_ttl(exists, redirect):
+            return None
+        
+        return exists, redirect
+
+    def set(self, wiki: str, path: str, exists: bool, redirect: bool):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO pages (wiki, path, exists_, redirect, checked) VALUES (?, ?, ?, ?, ?)',
+            (wiki, path, int(exists), int(redirect), self.now().timestamp()),
+        )
+        self._pending += 1
+        if self._pending >= 100:
+            self.connection.commit()
+            self._pending = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def check_wiki(name: str, result: Optional[dict] = None, check: bool = False):
+    result, pages = get_wiki_pages(name, result)
+
+    if check:
+        with WikiChecker() as checker:
+            for page, error in checker.check(pages):
+                if error is not None:
+                    print(f'could not check {page["url"]}: {error}')
+                elif not page['result']['exists']:
+                    print(f'no page for {page["url"]}')
+
+    return result